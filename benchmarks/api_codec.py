@@ -0,0 +1,67 @@
+"""Compare API payload sizes and decode times.
+
+Measures bytes on wire and decode time of typical API responses
+(browse page, rundown) for the original transport (uncompressed,
+str + json.loads) and the current one (compressed, bytes decoded
+by the fastest available codec).
+
+Usage: python -m benchmarks.api_codec
+"""
+
+import json
+import time
+
+from firefly import codec
+
+from .datasets import make_assets, make_rundown
+
+REPEAT = 20
+
+
+def timeit(func, *args) -> float:
+    """Return the best time (in milliseconds) of several runs."""
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1000
+
+
+def legacy_decode(data: bytes):
+    return json.loads(str(data, "utf-8"))
+
+
+def current_decode(data: bytes, encoding: str | None):
+    return codec.json_loads(codec.decompress(data, encoding))
+
+
+def benchmark(name: str, payload: dict) -> None:
+    raw = json.dumps(payload).encode("ascii")
+    encodings = ["gzip"] + (["zstd"] if codec.has_zstd else [])
+
+    print(f"\n{name}")
+    print(f"  {'transport':<24} {'bytes':>10} {'ratio':>7} {'decode ms':>10}")
+    legacy_time = timeit(legacy_decode, raw)
+    label = "identity/json (legacy)"
+    print(f"  {label:<24} {len(raw):>10} {1:>7.2f} {legacy_time:>10.2f}")
+    for encoding in [None] + encodings:
+        data = raw if encoding is None else codec.compress(raw, encoding)
+        label = f"{encoding or 'identity'}/{codec.json_codec}"
+        decode_time = timeit(current_decode, data, encoding)
+        ratio = len(data) / len(raw)
+        print(f"  {label:<24} {len(data):>10} {ratio:>7.2f} {decode_time:>10.2f}")
+
+
+def main():
+    print(f"JSON codec: {codec.json_codec}, zstd available: {codec.has_zstd}")
+    assets = make_assets(5000)
+    benchmark("browse (1001 assets)", {"data": assets[:1001]})
+    benchmark("get (100 assets)", {"data": assets[:100]})
+    benchmark("rundown (3000 rows)", {"rows": make_rundown(assets, 3000)})
+
+
+if __name__ == "__main__":
+    main()
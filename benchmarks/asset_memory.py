@@ -0,0 +1,67 @@
+"""Measure memory used by cached assets.
+
+Creates assets the way the asset cache does (each one decoded from its
+own stored JSON record) and reports the memory allocated per asset,
+compared to objects with a per-instance __dict__ and no interning.
+
+Usage: python -m benchmarks.asset_memory --assets 100000
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from firefly.codec import json_dumps, json_loads
+from firefly.objects import Asset
+
+from .datasets import make_asset
+
+
+class PlainObject:
+    """Asset representation used before slots and interning."""
+
+    def __init__(self, meta):
+        self.text_changed = self.meta_changed = False
+        self.is_new = False
+        self.meta = {}
+        for key in meta:
+            self.meta[key] = meta[key]
+
+
+def measure(factory, records: list[bytes]) -> tuple[int, list]:
+    """Return allocated bytes and objects created from the records."""
+    gc.collect()
+    tracemalloc.start()
+    objects = [factory(json_loads(record)) for record in records]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, objects
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", type=int, default=100000)
+    args = parser.parse_args()
+
+    records = [json_dumps(make_asset(i)) for i in range(1, args.assets + 1)]
+    print(f"{args.assets} assets, {sum(map(len, records)) / len(records):.0f} B JSON")
+
+    print(f"\n{'representation':<22} {'total MB':>9} {'B/asset':>8} {'keys':>9}")
+    for title, factory in [
+        ("decoded dicts", lambda meta: meta),
+        ("plain objects", PlainObject),
+        ("Asset", lambda meta: Asset(meta=meta)),
+    ]:
+        size, objects = measure(factory, records)
+        metas = [getattr(obj, "meta", obj) for obj in objects]
+        keys = len({id(key) for meta in metas for key in meta})
+        print(
+            f"{title:<22} {size / 1024 / 1024:>9.1f}"
+            f" {size / len(objects):>8.0f} {keys:>9}"
+        )
+        del objects, metas
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Synthetic Nebula datasets used by the benchmarks.
+
+Generated data is deterministic (seeded), so results of subsequent
+runs are comparable.
+"""
+
+import random
+import time
+
+from typing import Any
+
+GENRES = ["news", "sport", "movie", "series", "documentary", "music", "kids"]
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam"
+).split()
+
+
+def sentence(rng: random.Random, min_words: int = 2, max_words: int = 6) -> str:
+    count = rng.randint(min_words, max_words)
+    return " ".join(rng.choice(WORDS) for _ in range(count)).capitalize()
+
+
+# Creation time of the first generated asset. Assets are created
+# one minute apart, so ordering by id matches ordering by ctime.
+EPOCH = 1_600_000_000
+
+
+def make_asset(id_asset: int, seed: int = 42) -> dict[str, Any]:
+    """Return metadata of a single asset as sent by the server.
+
+    The result depends only on the id and seed, so assets of huge
+    datasets can be generated lazily.
+    """
+    rng = random.Random(seed * 1_000_003 + id_asset)
+    ctime = EPOCH + id_asset * 60
+    duration = rng.randint(10, 7200) + rng.random()
+    meta = {
+        "id": id_asset,
+        "id_folder": rng.randint(1, 8),
+        "media_type": 1,
+        "content_type": 1,
+        "status": rng.choice([0, 1, 1, 1, 1, 2]),
+        "id_storage": 1,
+        "path": f"media.dir/{id_asset:08d}.mov",
+        "ctime": ctime,
+        "mtime": ctime + rng.randint(0, 59),
+        "title": sentence(rng),
+        "subtitle": sentence(rng) if rng.random() > 0.5 else "",
+        "description": sentence(rng, 10, 40),
+        "duration": duration,
+        "fps": "25/1",
+        "mark_in": 0,
+        "mark_out": 0,
+        "genre": rng.choice(GENRES),
+        "id/main": f"{rng.choice(['A', 'B', 'C'])}{id_asset:06d}",
+        "qc/state": rng.choice([0, 0, 2, 4]),
+        "file/size": rng.randint(10**6, 10**10),
+        "file/mtime": ctime,
+        "video/width": 1920,
+        "video/height": 1080,
+        "audio/tracks": [{"index": 1, "channels": 2, "language": "en"}],
+        "promoted": 0,
+    }
+    return meta
+
+
+def make_assets(count: int, seed: int = 42, start_id: int = 1) -> list[dict]:
+    return [make_asset(start_id + i, seed) for i in range(count)]
+
+
+def make_rundown(
+    assets: list[dict],
+    rows: int,
+    items_per_block: int = 10,
+    start: float = 0,
+    id_channel: int = 1,
+    seed: int = 42,
+) -> list[dict]:
+    """Return rundown rows (events followed by their items)."""
+    rng = random.Random(seed)
+    start = start or time.time()
+    result = []
+    id_event = id_bin = id_item = 0
+    ts = start
+    while len(result) < rows:
+        id_event += 1
+        id_bin += 1
+        event_asset = rng.choice(assets)
+        block = []
+        block_duration = 0
+        for position in range(items_per_block):
+            asset = rng.choice(assets)
+            id_item += 1
+            block.append(
+                {
+                    "type": "item",
+                    "id": id_item,
+                    "id_bin": id_bin,
+                    "id_asset": asset["id"],
+                    "asset_mtime": asset["mtime"],
+                    "position": position,
+                    "title": asset["title"],
+                    "duration": asset["duration"],
+                    "status": 1,
+                    "run_mode": 0,
+                    "item_role": None,
+                    "scheduled_time": ts + block_duration,
+                    "broadcast_time": ts + block_duration,
+                    "mark_in": 0,
+                    "mark_out": 0,
+                }
+            )
+            block_duration += asset["duration"]
+        result.append(
+            {
+                "type": "event",
+                "id": id_event,
+                "id_bin": id_bin,
+                "id_channel": id_channel,
+                "id_asset": event_asset["id"],
+                "title": event_asset["title"],
+                "start": ts,
+                "duration": block_duration,
+                "scheduled_time": ts,
+                "broadcast_time": ts,
+                "run_mode": 0,
+                "promoted": 0,
+            }
+        )
+        result.extend(block)
+        ts += block_duration
+    return result[:rows]
+
+
+def make_jobs(assets: list[dict], count: int, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    now = time.time()
+    result = []
+    for id_job in range(1, count + 1):
+        status = rng.choice([0, 1, 2, 2, 2, 3])
+        ctime = now - rng.randint(0, 3600 * 24 * 7)
+        result.append(
+            {
+                "id": id_job,
+                "id_asset": rng.choice(assets)["id"],
+                "id_action": rng.randint(1, 5),
+                "action_name": rng.choice(["proxy", "playout", "archive"]),
+                "service_name": f"conv{rng.randint(1, 4)}",
+                "status": status,
+                "progress": rng.random() * 100 if status == 1 else 0,
+                "message": "",
+                "ctime": ctime,
+                "stime": ctime + 10 if status else None,
+                "etime": ctime + 100 if status > 1 else None,
+            }
+        )
+    return result
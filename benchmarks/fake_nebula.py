@@ -0,0 +1,549 @@
+"""Stand-in Nebula server for end-to-end benchmarks.
+
+Implements the API endpoints used by Firefly and the /ws Seismic
+WebSocket on top of synthetic datasets of configurable size.
+Every API call can be delayed by a fixed latency with random jitter.
+
+Usage: python -m benchmarks.fake_nebula --assets 200000 --port 4455
+"""
+
+import argparse
+import base64
+import datetime
+import gzip
+import hashlib
+import json
+import random
+import socket
+import struct
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from .datasets import make_asset, make_jobs, make_rundown
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+METATYPES = {
+    "title": {"ns": "m", "type": "string", "fulltext": 1},
+    "subtitle": {"ns": "m", "type": "string", "fulltext": 1},
+    "description": {"ns": "m", "type": "text", "fulltext": 1},
+    "genre": {"ns": "m", "type": "select", "cs": "urn:site:genre"},
+    "duration": {"ns": "f", "type": "timecode"},
+    "mark_in": {"ns": "f", "type": "timecode"},
+    "mark_out": {"ns": "f", "type": "timecode"},
+    "fps": {"ns": "f", "type": "fraction"},
+    "id/main": {"ns": "m", "type": "string"},
+    "qc/state": {"ns": "q", "type": "select"},
+    "qc/report": {"ns": "q", "type": "text"},
+    "promoted": {"ns": "m", "type": "boolean"},
+    "scheduled_time": {"ns": "b", "type": "datetime"},
+    "broadcast_time": {"ns": "b", "type": "datetime"},
+    "run_mode": {"ns": "b", "type": "integer"},
+    "file/size": {"ns": "f", "type": "integer"},
+}
+
+
+class Dataset:
+    """Synthetic site data.
+
+    Assets are generated lazily, so even very large libraries
+    start instantly. Modified assets are kept in memory.
+    """
+
+    def __init__(
+        self,
+        assets: int = 10000,
+        rundown_rows: int = 500,
+        jobs: int = 1000,
+        channels: int = 1,
+        seed: int = 42,
+    ):
+        self.asset_count = assets
+        self.rundown_rows = rundown_rows
+        self.job_count = jobs
+        self.channels = channels
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.modified: dict[int, dict] = {}
+        self.fulltext_cache: dict[str, list[int]] = {}
+        self.rundowns: dict[tuple[int, str], list[dict]] = {}
+        sample = [make_asset(i, seed) for i in range(1, min(assets, 5000) + 1)]
+        self.jobs = make_jobs(sample, jobs, seed)
+
+    def asset(self, id_asset: int) -> dict | None:
+        if id_asset in self.modified:
+            return self.modified[id_asset]
+        if 0 < id_asset <= self.asset_count:
+            return make_asset(id_asset, self.seed)
+        return None
+
+    def update_asset(self, id_asset: int, data: dict) -> dict | None:
+        with self.lock:
+            meta = self.asset(id_asset)
+            if meta is None:
+                return None
+            meta = {**meta, **data, "mtime": time.time()}
+            self.modified[id_asset] = meta
+            return meta
+
+    def browse(
+        self,
+        query: str = "",
+        limit: int = 1000,
+        offset: int = 0,
+        order_by: str = "ctime",
+        order_dir: str = "desc",
+        **kwargs,
+    ) -> list[dict]:
+        """Return a page of assets.
+
+        Ordering by creation time (which equals ordering by id) and
+        by modification time is supported. Other order_by keys are ignored.
+        """
+        if order_by == "mtime" and order_dir == "desc" and not query:
+            return self.recently_modified(limit, offset)
+
+        if query:
+            ids = self.fulltext(query)
+            if order_dir == "desc":
+                ids = ids[::-1]
+            ids = ids[offset:][:limit]
+            return [self.asset(i) for i in ids]
+
+        if order_dir == "desc":
+            first = self.asset_count - offset
+            last = max(0, first - limit)
+            ids = range(first, last, -1)
+        else:
+            first = offset + 1
+            ids = range(first, min(self.asset_count, first + limit - 1) + 1)
+        return [self.asset(i) for i in ids]
+
+    def recently_modified(self, limit: int, offset: int) -> list[dict]:
+        """Return a page of assets ordered by mtime (newest first).
+
+        Modified assets are newer than any generated one, and the mtime
+        of generated assets grows with their id.
+        """
+        with self.lock:
+            modified = sorted(
+                self.modified.values(), key=lambda meta: meta["mtime"], reverse=True
+            )
+        result = modified[offset:][:limit]
+        id_asset = self.asset_count - max(0, offset - len(modified))
+        while len(result) < limit and id_asset > 0:
+            if id_asset not in self.modified:
+                result.append(self.asset(id_asset))
+            id_asset -= 1
+        return result
+
+    def fulltext(self, query: str) -> list[int]:
+        query = query.lower()
+        if query not in self.fulltext_cache:
+            self.fulltext_cache[query] = [
+                i
+                for i in range(1, self.asset_count + 1)
+                if query in self.asset(i)["title"].lower()
+            ]
+        return self.fulltext_cache[query]
+
+    def rundown(self, id_channel: int, date: str) -> list[dict]:
+        key = (id_channel, date)
+        if key not in self.rundowns:
+            start = datetime.datetime.strptime(date, "%Y-%m-%d").timestamp()
+            start += 7 * 3600
+            assets = [
+                self.asset(i)
+                for i in random.Random(self.seed).sample(
+                    range(1, self.asset_count + 1), min(2000, self.asset_count)
+                )
+            ]
+            self.rundowns[key] = make_rundown(
+                assets,
+                self.rundown_rows,
+                start=start,
+                id_channel=id_channel,
+                seed=self.seed + id_channel,
+            )
+        return self.rundowns[key]
+
+    def events(self, id_channel: int, date: str) -> list[dict]:
+        return [row for row in self.rundown(id_channel, date) if row["type"] == "event"]
+
+    def job_list(self, view: str = "active") -> list[dict]:
+        states = {"active": [0, 1], "finished": [2], "failed": [3, 4]}.get(view, [])
+        return [job for job in self.jobs if job["status"] in states]
+
+    def settings(self) -> dict[str, Any]:
+        return {
+            "folders": [
+                {
+                    "id": i,
+                    "name": f"Folder {i}",
+                    "color": f"#{(i * 0x1F3A5B) % 0xFFFFFF:06x}",
+                    "fields": [{"name": "title"}, {"name": "genre"}],
+                }
+                for i in range(1, 9)
+            ],
+            "views": [
+                {
+                    "id": 1,
+                    "name": "Main",
+                    "position": 0,
+                    "columns": ["title", "id/main", "duration", "id_folder"],
+                }
+            ],
+            "metatypes": METATYPES,
+            "cs": {"urn:site:genre": [[g, {"title": g}] for g in ["news", "sport"]]},
+            "playout_channels": [
+                {"id": i, "name": f"Channel {i}"} for i in range(1, self.channels + 1)
+            ],
+        }
+
+
+#
+# WebSocket
+#
+
+
+def ws_recv(rfile) -> tuple[int, bytes] | None:
+    """Read one (client, hence masked) frame. Returns (opcode, payload)."""
+    header = rfile.read(2)
+    if len(header) < 2:
+        return None
+    opcode = header[0] & 0x0F
+    length = header[1] & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", rfile.read(2))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", rfile.read(8))[0]
+    mask = rfile.read(4) if header[1] & 0x80 else b"\0\0\0\0"
+    data = rfile.read(length)
+    return opcode, bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+
+def ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header += bytes([length])
+    elif length < 65536:
+        header += bytes([126]) + struct.pack(">H", length)
+    else:
+        header += bytes([127]) + struct.pack(">Q", length)
+    return header + payload
+
+
+class SeismicClient:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.subscriptions = ["*"]
+
+    def send(self, frame: bytes) -> bool:
+        try:
+            with self.lock:
+                self.sock.sendall(frame)
+        except OSError:
+            return False
+        return True
+
+
+#
+# HTTP
+#
+
+
+class FakeNebulaHandler(BaseHTTPRequestHandler):
+    server: "FakeNebula"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/ws":
+            self.handle_websocket()
+            return
+        self.respond(404, {"detail": "Not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.headers.get("Content-Encoding", "") == "gzip":
+            body = gzip.decompress(body)
+        payload = json.loads(body or b"{}")
+
+        endpoint = self.path.removeprefix("/api/").strip("/")
+        handler = getattr(self.server, f"api_{endpoint}", None)
+        self.server.delay()
+        if handler is None:
+            self.respond(404, {"detail": f"Unknown endpoint {endpoint}"})
+            return
+        try:
+            result = handler(**payload)
+        except Exception as e:
+            self.respond(500, {"detail": str(e)})
+            return
+        self.respond(200, result)
+
+    def respond(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode("utf-8")
+        encoding = None
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=5)
+            encoding = "gzip"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats["bytes_sent"] += len(body)
+
+    def handle_websocket(self):
+        key = self.headers.get("Sec-WebSocket-Key", "")
+        accept = base64.b64encode(
+            hashlib.sha1((key + WS_GUID).encode("ascii")).digest()
+        ).decode("ascii")
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+
+        client = SeismicClient(self.connection)
+        self.server.add_client(client)
+        try:
+            while True:
+                frame = ws_recv(self.rfile)
+                if frame is None:
+                    break
+                opcode, data = frame
+                if opcode == 0x8:
+                    client.send(ws_frame(b"", 0x8))
+                    break
+                if opcode == 0x9:
+                    client.send(ws_frame(data, 0xA))
+                elif opcode == 0x1:
+                    self.server.on_ws_message(client, data)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.server.remove_client(client)
+        self.close_connection = True
+
+
+class FakeNebula(ThreadingHTTPServer):
+    """Fake Nebula server.
+
+    Latency and jitter are in seconds. Call `start()` to run the server
+    in a background thread and `shutdown()` to stop it.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        dataset: Dataset,
+        host: str = "127.0.0.1",
+        port: int = 4455,
+        latency: float = 0,
+        jitter: float = 0,
+    ):
+        super().__init__((host, port), FakeNebulaHandler)
+        self.dataset = dataset
+        self.latency = latency
+        self.jitter = jitter
+        self.clients: list[SeismicClient] = []
+        self.clients_lock = threading.Lock()
+        self.stats = {"bytes_sent": 0, "messages_sent": 0}
+        self.playout_status: dict[int, dict] = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def delay(self) -> None:
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    #
+    # Seismic
+    #
+
+    def add_client(self, client: SeismicClient) -> None:
+        with self.clients_lock:
+            self.clients.append(client)
+
+    def remove_client(self, client: SeismicClient) -> None:
+        with self.clients_lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def disconnect_clients(self) -> None:
+        """Drop all Seismic connections (simulates a network outage)."""
+        with self.clients_lock:
+            clients, self.clients = self.clients, []
+        for client in clients:
+            try:
+                client.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def on_ws_message(self, client: SeismicClient, data: bytes) -> None:
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get("topic") == "auth":
+            client.subscriptions = message.get("subscribe", ["*"])
+
+    def broadcast(self, topic: str, data: dict[str, Any]) -> int:
+        """Send a Seismic message to all subscribed clients."""
+        message = {"topic": topic, "data": data, "host": "fake-nebula"}
+        message["timestamp"] = time.time()
+        frame = ws_frame(json.dumps(message).encode("utf-8"))
+        with self.clients_lock:
+            clients = list(self.clients)
+        sent = 0
+        for client in clients:
+            if "*" not in client.subscriptions and topic not in client.subscriptions:
+                continue
+            if client.send(frame):
+                sent += 1
+        self.stats["messages_sent"] += sent
+        return sent
+
+    def objects_changed(self, object_type: str, ids: list[int], **kwargs) -> None:
+        self.broadcast(
+            "objects_changed",
+            {"object_type": object_type, "objects": ids, **kwargs},
+        )
+
+    #
+    # API
+    #
+
+    def api_init(self, **kwargs):
+        return {
+            "user": {"login": "benchmark", "is_admin": True},
+            "settings": self.dataset.settings(),
+        }
+
+    def api_login(self, **kwargs):
+        return {"access_token": "benchmark"}
+
+    def api_logout(self, **kwargs):
+        return {"message": "Logged out"}
+
+    def api_browse(self, columns: list[str] | None = None, **kwargs):
+        data = self.dataset.browse(**kwargs)
+        if columns:
+            # Like Nebula, return only the requested columns
+            data = [{key: meta.get(key) for key in columns} for meta in data]
+        return {"data": data}
+
+    def api_get(self, ids: list[int] = [], **kwargs):
+        assets = [self.dataset.asset(int(i)) for i in ids]
+        return {"data": [a for a in assets if a is not None]}
+
+    def api_rundown(self, id_channel: int = 1, date: str = "", **kwargs):
+        date = date or time.strftime("%Y-%m-%d")
+        return {"rows": self.dataset.rundown(id_channel, date)}
+
+    def api_scheduler(self, id_channel: int = 1, date: str = "", **kwargs):
+        date = date or time.strftime("%Y-%m-%d")
+        return {"events": self.dataset.events(id_channel, date)}
+
+    def api_order(self, id_channel: int = 1, bin: int = 0, **kwargs):
+        self.objects_changed("bin", [bin])
+        return {}
+
+    def api_set(self, id: int = 0, objects: list[int] = [], data: dict = {}, **kw):
+        ids = objects or [id]
+        metas = [meta for i in ids if (meta := self.dataset.update_asset(i, data))]
+        self.objects_changed("asset", [meta["id"] for meta in metas], meta=metas)
+        return {"id": id or None, "meta": metas}
+
+    def api_ops(self, operations: list[dict] = [], **kwargs):
+        changed = []
+        for op in operations:
+            if self.dataset.update_asset(op["id"], op.get("data", {})):
+                changed.append(op["id"])
+        self.objects_changed("asset", changed)
+        return {}
+
+    def api_jobs(self, view: str = "active", **kwargs):
+        return {"jobs": self.dataset.job_list(view)}
+
+    def api_playout(self, id_channel: int = 1, action: str = "", **kwargs):
+        if action == "plugin_list":
+            return {"plugins": []}
+        status = self.playout_status.setdefault(
+            id_channel,
+            {"id_channel": id_channel, "current_item": 0, "cued_item": 0},
+        )
+        if action == "take":
+            status["current_item"] = status["cued_item"]
+        elif action in ["cue_forward", "cue_backward"]:
+            status["cued_item"] += 1 if action == "cue_forward" else -1
+        self.broadcast("playout_status", self.playout_status_data(id_channel))
+        return {}
+
+    def playout_status_data(self, id_channel: int) -> dict[str, Any]:
+        status = self.playout_status.get(id_channel, {})
+        return {
+            "id_channel": id_channel,
+            "current_item": status.get("current_item", 0),
+            "cued_item": status.get("cued_item", 0),
+            "position": 0,
+            "duration": 0,
+            "fps": 25,
+            "current_title": "",
+            "cued_title": "",
+            "request_time": time.time(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4455)
+    parser.add_argument("--assets", type=int, default=200000)
+    parser.add_argument("--rundown-rows", type=int, default=3000)
+    parser.add_argument("--jobs", type=int, default=50000)
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.005, help="seconds")
+    args = parser.parse_args()
+
+    dataset = Dataset(
+        assets=args.assets,
+        rundown_rows=args.rundown_rows,
+        jobs=args.jobs,
+        channels=args.channels,
+    )
+    server = FakeNebula(dataset, args.host, args.port, args.latency, args.jitter)
+    print(f"Fake Nebula listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
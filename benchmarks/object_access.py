@@ -0,0 +1,73 @@
+"""Measure the cost of metadata lookups on objects.
+
+Table views call `obj[key]` for every painted cell and every sort
+comparison. Reports the time per lookup for the common cases.
+
+Usage: python -m benchmarks.object_access
+"""
+
+import time
+
+import firefly
+
+from firefly.metadata import clear_cs_cache
+from firefly.objects import Asset, Item, asset_cache
+
+from .datasets import make_asset
+from .fake_nebula import Dataset
+
+KEYS = ["title", "duration", "genre", "status", "qc/state", "id/main", "mark_in"]
+REPEAT = 5
+
+
+def per_lookup(func, objects, keys) -> float:
+    """Return the best time (in nanoseconds) of a single lookup."""
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for obj in objects:
+            for key in keys:
+                func(obj, key)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / (len(objects) * len(keys)) * 1e9
+
+
+def main():
+    firefly.settings.update(Dataset(assets=1).settings())
+    clear_cs_cache()
+
+    assets = [Asset(meta=make_asset(i)) for i in range(1, 10001)]
+    for asset in assets:
+        asset_cache.put(asset.id, asset)
+    items = [
+        Item(meta={"id": i, "id_asset": asset.id, "id_bin": 1, "position": i})
+        for i, asset in enumerate(assets, 1)
+    ]
+    for item, asset in zip(items, assets):
+        item._asset = asset
+    detached = [Item(meta=dict(item.meta)) for item in items]
+
+    def get(obj, key):
+        return obj[key]
+
+    print(f"{'lookup':<34} {'ns':>8}")
+    for title, objects, keys in [
+        ("asset, stored key", assets, KEYS),
+        ("asset, default value", assets, ["subject", "rights", "notes"]),
+        ("asset, mixed case key", assets, ["Title", "Duration "]),
+        ("item, own key", items, ["id_bin", "position"]),
+        ("item, asset key", items, KEYS),
+        ("item, asset key (from cache)", detached, KEYS),
+    ]:
+        print(f"{title:<34} {per_lookup(get, objects, keys):>8.0f}")
+
+    start = time.perf_counter()
+    sorted(assets, key=lambda asset: asset["title"])
+    print(f"\nSorting {len(assets)} assets by title: ", end="")
+    print(f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
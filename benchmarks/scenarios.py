@@ -0,0 +1,276 @@
+"""End-to-end scenarios against the fake Nebula server.
+
+Starts the fake server in-process and drives the real Firefly API client,
+asset cache and view models headlessly (Qt offscreen platform).
+Reports wall-clock timings of each scenario followed by the per-endpoint
+API metrics.
+
+Usage: python -m benchmarks.scenarios --assets 200000 --rundown-rows 3000
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import firefly  # noqa: E402
+
+from firefly.api import api  # noqa: E402
+from firefly.config import config, SiteConfiguration  # noqa: E402
+from firefly.metadata import clear_cs_cache  # noqa: E402
+from firefly.metrics import api_metrics, percentile  # noqa: E402
+from firefly.objects import asset_cache  # noqa: E402
+from firefly.qt import QApplication, QEventLoop, QTimer, QWidget  # noqa: E402
+
+from .fake_nebula import Dataset, FakeNebula  # noqa: E402
+
+TIMEOUT = 60
+
+
+class BrowserHost(QWidget):
+    """Minimal stand-in for the browser tab the model expects as a parent."""
+
+    def __init__(self):
+        super(BrowserHost, self).__init__()
+        self.current_page = 1
+        self.page_count = 1
+
+    def set_page(self, current_page, page_count):
+        self.current_page = current_page
+        self.page_count = page_count
+
+
+class RundownHost(QWidget):
+    """Minimal stand-in for the rundown module."""
+
+    def __init__(self, id_channel=1):
+        super(RundownHost, self).__init__()
+        self.id_channel = id_channel
+        self.start_time = time.time()
+        self.current_item = 0
+        self.cued_item = 0
+
+
+def wait_for(condition, timeout=TIMEOUT):
+    """Process Qt events until the condition is met."""
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.timeout.connect(lambda: condition() and loop.quit())
+    timer.start(1)
+    deadline = QTimer()
+    deadline.setSingleShot(True)
+    deadline.timeout.connect(loop.quit)
+    deadline.start(int(timeout * 1000))
+    if not condition():
+        loop.exec()
+    timer.stop()
+    deadline.stop()
+    if not condition():
+        raise TimeoutError("Scenario timed out")
+
+
+class Scenarios:
+    def __init__(self, server: FakeNebula, args):
+        self.server = server
+        self.dataset = server.dataset
+        self.args = args
+        self.browser = BrowserHost()
+        self.rundown = RundownHost()
+
+        from firefly.modules.browser_model import BrowserModel
+        from firefly.modules.rundown.model import RundownModel
+
+        self.browser_model = BrowserModel(self.browser)
+        self.rundown_model = RundownModel(self.rundown)
+
+    def run_get(self, i):
+        ids = list(range(i * 100 + 1, i * 100 + 101))
+        response = api.get(ids=ids)
+        assert response, response.message
+
+    def run_browse(self, i):
+        done = []
+        self.browser.current_page = i % 5 + 1
+        self.browser_model.load(
+            lambda: done.append(True),
+            id_view=1,
+            fulltext="",
+            order_by="ctime",
+            order_dir="desc",
+        )
+        wait_for(lambda: done)
+
+    def run_browse_superseded(self, i):
+        """Several quick queries, only the last one should finish."""
+        done = []
+        for query in ["a", "an", "ana", ""]:
+            self.browser_model.load(
+                lambda: done.append(True),
+                id_view=1,
+                fulltext=query,
+                order_by="ctime",
+                order_dir="desc",
+            )
+        wait_for(lambda: done)
+
+    def run_rundown(self, i):
+        done = []
+        self.rundown_model.load()
+        self.rundown_model.current_callback = None
+        self.rundown.start_time = time.time() + i * 86400
+        # RundownModel.load has no completion callback, so wait
+        # until the model is populated and the assets are fetched.
+        self.rundown_model.object_data = []
+        self.rundown_model.modelReset.connect(lambda: done.append(True))
+        wait_for(lambda: done)
+        self.rundown_model.modelReset.disconnect()
+        wait_for(lambda: not api.in_flight)
+
+    def run_asset_cache(self, i):
+        start = 10000 + i * 1000
+        ids = [[id_asset, 0] for id_asset in range(start, start + 1000)]
+        asset_cache.request(ids)
+        wait_for(lambda: all(id_asset in asset_cache.data for id_asset, _ in ids))
+
+    def run_jobs(self, i):
+        response = api.jobs(view=["active", "finished", "failed"][i % 3])
+        assert response, response.message
+
+    def run_seismic(self, i):
+        """Time from server broadcast to the messages in the GUI thread."""
+        self.seismic_received = 0
+        count = 100
+        for j in range(count):
+            self.server.objects_changed("asset", [j + 1])
+        wait_for(lambda: self.seismic_received >= count)
+
+    def on_seismic_messages(self):
+        self.listener.acknowledge()
+        while not self.listener.queue.empty():
+            self.listener.queue.get()
+            self.seismic_received += 1
+
+    def scenario(self, name, func, repeat):
+        timings = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            func(i)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(
+            f"{name:<20} {len(timings):>6} {percentile(timings, 50):>10.1f}"
+            f" {percentile(timings, 90):>10.1f} {timings[-1]:>10.1f}"
+        )
+
+    def run(self):
+        repeat = self.args.repeat
+        print(f"\n{'scenario':<20} {'runs':>6} {'p50 ms':>10} {'p90 ms':>10}", end="")
+        print(f" {'max ms':>10}")
+        self.scenario("get (100 ids)", self.run_get, repeat)
+        self.scenario("browse page", self.run_browse, repeat)
+        self.scenario("browse superseded", self.run_browse_superseded, repeat)
+        self.scenario("rundown", self.run_rundown, repeat)
+        self.scenario("asset cache (1000)", self.run_asset_cache, repeat)
+        self.scenario("jobs", self.run_jobs, repeat)
+
+        from firefly.listener import SeismicListener
+
+        self.listener = SeismicListener()
+        self.listener.messages_pending.connect(self.on_seismic_messages)
+        self.listener.start()
+        self.seismic_received = 0
+        wait_for(lambda: self.listener.active or self.listener_ready())
+        self.scenario("seismic (100 msgs)", self.run_seismic, repeat)
+        self.listener.halt()
+        self.listener.wait()
+
+    def listener_ready(self):
+        # The listener is marked active on the first received message
+        self.server.broadcast("log", {"message": "ping"})
+        time.sleep(0.01)
+        return self.listener.active
+
+
+def print_metrics():
+    print(
+        f"\n{'endpoint':<12} {'count':>6} {'queue p50':>10} {'ttfb p50':>10}"
+        f" {'total p50':>10} {'total p99':>10} {'decode p50':>11} {'resp kB':>9}"
+    )
+    for endpoint, data in api_metrics.summary().items():
+        print(
+            f"{endpoint:<12} {data['count']:>6}"
+            f" {data['queue_wait']['p50']:>10.1f}"
+            f" {data['ttfb']['p50']:>10.1f}"
+            f" {data['total']['p50']:>10.1f}"
+            f" {data['total']['p99']:>10.1f}"
+            f" {data['decode']['p50']:>11.1f}"
+            f" {data['response_bytes']['mean'] / 1024:>9.1f}"
+        )
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--assets", type=int, default=200000)
+    parser.add_argument("--rundown-rows", type=int, default=3000)
+    parser.add_argument("--jobs", type=int, default=50000)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.005, help="seconds")
+
+
+def start_server(args) -> FakeNebula:
+    """Start the fake server in a background thread and point the client to it."""
+    dataset = Dataset(
+        assets=args.assets,
+        rundown_rows=args.rundown_rows,
+        jobs=args.jobs,
+    )
+    server = FakeNebula(dataset, port=0, latency=args.latency, jitter=args.jitter)
+    server.start()
+    config.site = SiteConfiguration(name="benchmark", host=server.url)
+    print(f"Fake Nebula at {server.url}: {args.assets} assets,", end="")
+    print(f" {args.rundown_rows} rundown rows, {args.jobs} jobs,", end="")
+    print(f" latency {args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms")
+    return server
+
+
+def init_client() -> None:
+    """Log in and load the site settings (as the application does)."""
+    response = api.init()
+    if not response:
+        raise SystemExit(f"Unable to initialize: {response.message}")
+    firefly.user.update(response["user"])
+    firefly.settings.update(response["settings"])
+    clear_cs_cache()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_server_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--no-warm-up",
+        action="store_true",
+        help="do not pre-connect to the server on startup",
+    )
+    args = parser.parse_args()
+
+    server = start_server(args)
+    app = QApplication([])
+    assert app
+
+    start_time = time.perf_counter()
+    if not args.no_warm_up:
+        api.warm_up()
+    init_client()
+
+    scenarios = Scenarios(server, args)
+    scenarios.run_browse(0)
+    print(f"Time to first row: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+    scenarios.run()
+    print_metrics()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""Record and replay Seismic traffic.
+
+record    Connects to a Nebula server and stores the raw Seismic stream
+          to a gzipped file. Each line contains the time (in seconds since
+          the start of the recording) and the raw message.
+generate  Creates a synthetic message storm in the same format.
+replay    Opens the real main window headlessly (against the fake server)
+          and feeds a recording to its Seismic listener at the given speed.
+          Reports per-topic handler latency, queue depth and GUI stalls.
+
+Usage:
+    python -m benchmarks.seismic_replay record --url wss://nebula/ws -o storm.gz
+    python -m benchmarks.seismic_replay generate -o storm.gz --rate 500
+    python -m benchmarks.seismic_replay replay storm.gz --speed 10
+"""
+
+import argparse
+import collections
+import gzip
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from nxtools import logging  # noqa: E402
+
+from firefly.metrics import RollingHistogram  # noqa: E402
+from firefly.qt import Qt, QApplication, QTimer  # noqa: E402
+
+from .scenarios import add_server_arguments, init_client, start_server  # noqa: E402
+from .scenarios import wait_for  # noqa: E402
+
+# GUI thread gaps longer than this (in milliseconds) are reported as stalls
+STALL_THRESHOLD = 50
+
+
+#
+# Recording format
+#
+
+
+def write_recording(path: str, messages) -> int:
+    """Write (time, raw message) pairs. Returns the number of messages."""
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for offset, raw in messages:
+            f.write(f"{offset:.4f} {raw}\n")
+            count += 1
+    return count
+
+
+def read_recording(path: str) -> list[tuple[float, str]]:
+    result = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            offset, raw = line.rstrip("\n").split(" ", 1)
+            result.append((float(offset), raw))
+    return result
+
+
+#
+# Record
+#
+
+
+def record(args) -> None:
+    import websocket
+
+    ws = websocket.create_connection(args.url)
+    auth = {"topic": "auth", "token": args.token, "subscribe": ["*"]}
+    ws.send(json.dumps(auth))
+    start_time = time.time()
+    print(f"Recording {args.url} to {args.output}. Press Ctrl+C to stop")
+
+    def stream():
+        while not args.duration or time.time() - start_time < args.duration:
+            try:
+                raw = ws.recv()
+            except KeyboardInterrupt:
+                break
+            if raw:
+                yield time.time() - start_time, raw
+
+    count = write_recording(args.output, stream())
+    ws.close()
+    print(f"Recorded {count} messages in {time.time() - start_time:.1f}s")
+
+
+#
+# Generate
+#
+
+
+def generate(args) -> None:
+    """Synthetic storm: asset changes during ingest, playout status
+    of all channels and progress of running jobs."""
+    rng = random.Random(args.seed)
+    events = []
+
+    def add(offset, topic, data):
+        message = {"topic": topic, "data": data, "host": "generator"}
+        events.append((offset, message))
+
+    for i in range(int(args.duration * args.rate)):
+        ids = rng.sample(range(1, args.assets + 1), rng.randint(1, 5))
+        add(
+            rng.uniform(0, args.duration),
+            "objects_changed",
+            {"object_type": "asset", "objects": ids},
+        )
+
+    for id_channel in range(1, args.channels + 1):
+        for i in range(int(args.duration * 5)):
+            add(
+                i / 5,
+                "playout_status",
+                {
+                    "id_channel": id_channel,
+                    "current_item": 1,
+                    "cued_item": 2,
+                    "position": i * 5,
+                    "duration": 25 * 3600,
+                    "fps": 25,
+                    "paused": False,
+                    "loop": False,
+                    "request_time": 0,
+                    "current_title": "",
+                    "cued_title": "",
+                },
+            )
+
+    for id_job in range(1, 51):
+        for i in range(int(args.duration)):
+            add(
+                i + id_job / 50,
+                "job_progress",
+                {
+                    "id": id_job,
+                    "id_asset": id_job,
+                    "id_action": 1,
+                    "status": 1,
+                    "progress": min(100, i),
+                    "message": "In progress",
+                },
+            )
+
+    events.sort(key=lambda event: event[0])
+    messages = [(offset, json.dumps(message)) for offset, message in events]
+    count = write_recording(args.output, messages)
+    print(f"Generated {count} messages ({count / args.duration:.0f}/s)")
+
+
+#
+# Replay
+#
+
+
+class ReplayProbe:
+    """Collects handler latency, queue depth and GUI stalls during a replay."""
+
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self.handler_time = collections.defaultdict(RollingHistogram)
+        self.delivery_time = collections.defaultdict(RollingHistogram)
+        self.handled = collections.Counter()
+        self.queue_depth = []
+        self.stalls = []
+        self.last_tick = None
+        self.start_time = time.perf_counter()
+
+        original_handler = main_window.seismic_handler
+
+        def seismic_handler(message):
+            start_time = time.perf_counter()
+            original_handler(message)
+            end_time = time.perf_counter()
+            self.handled[message.topic] += 1
+            self.handler_time[message.topic].add((end_time - start_time) * 1000)
+            delivery = (time.time() - message.timestamp) * 1000
+            self.delivery_time[message.topic].add(delivery)
+
+        main_window.seismic_handler = seismic_handler
+
+        self.ticker = QTimer()
+        self.ticker.setTimerType(Qt.TimerType.PreciseTimer)
+        self.ticker.timeout.connect(self.on_tick)
+        self.ticker.start(10)
+
+    def on_tick(self):
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            gap = (now - self.last_tick) * 1000
+            if gap > STALL_THRESHOLD:
+                self.stalls.append(gap)
+        self.last_tick = now
+        depth = self.main_window.listener.queue.qsize()
+        depth += len(self.main_window.seismic_backlog)
+        self.queue_depth.append((now - self.start_time, depth))
+
+    def stop(self):
+        self.ticker.stop()
+
+    def report(self, received: int, duration: float) -> None:
+        print(f"\nReceived {received} messages in {duration:.2f}s", end="")
+        print(f", dispatched {sum(self.handled.values())} after coalescing")
+
+        print(
+            f"\n{'topic':<18} {'handled':>8} {'handler p50':>12} {'p99':>8}"
+            f" {'max':>8} {'delivery p50':>13} {'p99':>8}"
+        )
+        for topic in sorted(self.handled):
+            handler = self.handler_time[topic].summary()
+            delivery = self.delivery_time[topic].summary()
+            print(
+                f"{topic:<18} {self.handled[topic]:>8} {handler['p50']:>12.2f}"
+                f" {handler['p99']:>8.2f} {handler['max']:>8.2f}"
+                f" {delivery['p50']:>13.1f} {delivery['p99']:>8.1f}"
+            )
+
+        print("\nQueue depth (max per second)")
+        per_second = collections.defaultdict(int)
+        for offset, depth in self.queue_depth:
+            second = int(offset)
+            per_second[second] = max(per_second[second], depth)
+        print("  " + " ".join(str(per_second[i]) for i in sorted(per_second)))
+
+        print(
+            f"\nGUI stalls over {STALL_THRESHOLD} ms: {len(self.stalls)}"
+            f", total {sum(self.stalls):.0f} ms"
+            f", longest {max(self.stalls, default=0):.0f} ms"
+        )
+
+
+def replay(args) -> None:
+    messages = read_recording(args.recording)
+    if not messages:
+        raise SystemExit("Empty recording")
+
+    server = start_server(args)
+    app = QApplication([])
+    app.app_state = {}
+    app.app_state_path = os.path.join(tempfile.mkdtemp(), "replay.appstate")
+    init_client()
+
+    from firefly.main_window import FireflyMainWindow, FireflyMainWidget
+
+    main_window = FireflyMainWindow(app, FireflyMainWidget)
+    logging.handlers = []
+    module = getattr(main_window, args.module)
+    if module:
+        main_window.main_widget.switch_tab(module)
+    wait_for(lambda: main_window.listener.connected)
+
+    listener = main_window.listener
+    probe = ReplayProbe(main_window)
+    received = 0
+
+    def feed():
+        nonlocal received
+        start_time = time.perf_counter()
+        for offset, raw in messages:
+            delay = start_time + offset / args.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            listener.on_message(raw)
+            received += 1
+
+    print(f"Replaying {len(messages)} messages at {args.speed}x", end="")
+    print(f" ({messages[-1][0] / args.speed:.1f}s) to the {args.module} module")
+    start_time = time.perf_counter()
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    wait_for(
+        lambda: not feeder.is_alive()
+        and listener.queue.empty()
+        and not main_window.seismic_backlog,
+        timeout=messages[-1][0] / args.speed + 60,
+    )
+    duration = time.perf_counter() - start_time
+    probe.stop()
+    probe.report(received, duration)
+
+    listener.halt()
+    listener.wait()
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_record = commands.add_parser("record", help="record a Seismic stream")
+    parser_record.add_argument("--url", required=True, help="ws(s)://host/ws")
+    parser_record.add_argument("--token", default=None, help="access token")
+    parser_record.add_argument("--duration", type=float, default=0, help="seconds")
+    parser_record.add_argument("-o", "--output", required=True)
+
+    parser_generate = commands.add_parser("generate", help="create a message storm")
+    parser_generate.add_argument("-o", "--output", required=True)
+    parser_generate.add_argument("--duration", type=float, default=10)
+    parser_generate.add_argument(
+        "--rate", type=float, default=200, help="objects_changed per second"
+    )
+    parser_generate.add_argument("--assets", type=int, default=200000)
+    parser_generate.add_argument("--channels", type=int, default=1)
+    parser_generate.add_argument("--seed", type=int, default=42)
+
+    parser_replay = commands.add_parser("replay", help="replay a recording")
+    parser_replay.add_argument("recording")
+    parser_replay.add_argument("--speed", type=float, default=1, help="1 - 50")
+    parser_replay.add_argument(
+        "--module",
+        default="rundown",
+        choices=["browser", "detail", "rundown", "scheduler", "jobs"],
+        help="module shown during the replay",
+    )
+    add_server_arguments(parser_replay)
+
+    args = parser.parse_args()
+    {"record": record, "generate": generate, "replay": replay}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
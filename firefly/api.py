@@ -1,16 +1,27 @@
-import time
+import collections
 import json
+import time
 import functools
 
 from nxtools import logging, log_traceback
 
+from firefly.codec import ACCEPT_ENCODING, compress, decompress, json_dumps, json_loads
 from firefly.config import config
+from firefly.enum import RequestPriority
+from firefly.metrics import api_metrics
 from firefly.objects import asset_cache
 from firefly.version import FIREFLY_VERSION
 from firefly.qt import (
-    QApplication,
+    Signal,
+    QObject,
+    QThreadPool,
+    QEventLoop,
     QNetworkAccessManager,
+    QNetworkReply,
     QNetworkRequest,
+    QSslConfiguration,
+    QSslSocket,
+    QTimer,
     QUrl,
 )
 
@@ -57,83 +68,537 @@ class NebulaResponse:
         return self.is_success
 
 
+# Request bodies larger than this (in bytes) are compressed,
+# if request compression is enabled in the configuration.
+COMPRESSION_THRESHOLD = 4096
+
+# Responses larger than this (in bytes) are decoded in a worker thread.
+DECODE_THREAD_THRESHOLD = 32768
+
+# Read-only endpoints. Identical requests to these endpoints, which are
+# issued while the previous one is still queued (not sent), share a single reply.
+COALESCED_ENDPOINTS = ["get", "browse", "rundown"]
+
+# Priority of requests, which don't specify one explicitly.
+ENDPOINT_PRIORITIES = {
+    "playout": RequestPriority.CRITICAL,
+}
+
+# Maximum number of concurrently running requests per priority.
+# Over HTTP/1.1 Qt opens up to six connections per host, so the limits
+# of the lower priorities leave at least one connection free for critical
+# requests. HTTP/2 multiplexes all of them over a single connection.
+PRIORITY_LIMITS = {
+    RequestPriority.CRITICAL: None,
+    RequestPriority.INTERACTIVE: 3,
+    RequestPriority.BACKGROUND: 2,
+}
+
+QT_PRIORITIES = {
+    RequestPriority.CRITICAL: QNetworkRequest.Priority.HighPriority,
+    RequestPriority.INTERACTIVE: QNetworkRequest.Priority.NormalPriority,
+    RequestPriority.BACKGROUND: QNetworkRequest.Priority.LowPriority,
+}
+
+
+def request_key(endpoint: str, payload: dict) -> str:
+    """Return a canonical identifier of a request."""
+    return endpoint + ":" + json.dumps(payload, sort_keys=True, default=str)
+
+
+class NebulaRequest:
+    """Handle of a single API request (a concurrent.futures.Future lookalike)."""
+
+    def __init__(self, endpoint: str, payload: dict, timeout: float | None = None):
+        self.endpoint = endpoint
+        self.payload = payload
+        self.timeout = timeout
+        self.transfer = None
+        self._response = None
+        self._cancelled = False
+        self._callbacks = []
+        self._loops = []
+
+    def __repr__(self):
+        return f"<NebulaRequest {self.endpoint}>"
+
+    @property
+    def reply(self):
+        if self.transfer is None:
+            return None
+        return self.transfer.reply
+
+    def done(self) -> bool:
+        return self._response is not None
+
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> bool:
+        """Abort the request. Callbacks of a cancelled request never run."""
+        if self.done():
+            return False
+        self._cancelled = True
+        self._finish(NebulaResponse(499, "Request cancelled"))
+        self._detach()
+        return True
+
+    def add_done_callback(self, callback) -> None:
+        """Call `callback(response)` once the request is finished."""
+        if not callback:
+            return
+        if not self.done():
+            self._callbacks.append(callback)
+        elif not self._cancelled:
+            callback(self._response)
+
+    def result(self, timeout: float | None = None) -> NebulaResponse:
+        """Wait for the response (without processing user input) and return it."""
+        if not self.done():
+            loop = QEventLoop()
+            timer = QTimer()
+            timer.setSingleShot(True)
+            timer.timeout.connect(loop.quit)
+            if timeout is not None:
+                timer.start(int(timeout * 1000))
+            self._loops.append(loop)
+            loop.exec(QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents)
+            self._loops.remove(loop)
+            timer.stop()
+        if not self.done():
+            self._finish(NebulaResponse(408, f"{self.endpoint} request timed out"))
+            self._detach()
+        return self._response
+
+    def _detach(self) -> None:
+        if self.transfer is not None:
+            self.transfer.detach(self)
+
+    def _finish(self, response: NebulaResponse) -> None:
+        if self.done():
+            return
+        self._response = response
+        for loop in self._loops:
+            loop.quit()
+        if self._cancelled:
+            return
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(response)
+            except Exception:
+                log_traceback(f"Unhandled exception in {self.endpoint} callback")
+
+
+class NebulaTransfer:
+    """Network request shared by all handles waiting for its response."""
+
+    def __init__(
+        self,
+        api,
+        endpoint: str,
+        payload: dict,
+        key: str | None = None,
+        prepare=None,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+        timeout: float | None = None,
+    ):
+        self.api = api
+        self.endpoint = endpoint
+        self.payload = payload
+        self.key = key
+        self.prepare = prepare
+        self.priority = priority
+        self.timeout = timeout
+        self.running = False
+        self.reply = None
+        self.finished = False
+        self.handles = []
+        self.status = None
+        self.url = ""
+        self.timed_out = False
+
+        # Instrumentation (perf_counter timestamps, sizes in bytes)
+        self.created_at = time.perf_counter()
+        self.sent_at = None
+        self.first_byte_at = None
+        self.finished_at = None
+        self.decode_time = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def attach(self, query: NebulaRequest) -> None:
+        query.transfer = self
+        self.handles.append(query)
+        self.api.queries.append(query)
+
+    def detach(self, query: NebulaRequest) -> None:
+        if query in self.handles:
+            self.handles.remove(query)
+            self.api.queries.remove(query)
+        if self.handles:
+            return
+        self.api.release(self)
+        if self.reply is None:
+            self.api.dequeue(self)
+        elif not self.finished:
+            self.reply.abort()
+
+    def finish(self, response: NebulaResponse) -> None:
+        handles, self.handles = self.handles, []
+        for query in handles:
+            self.api.queries.remove(query)
+        for query in handles:
+            query._finish(response)
+
+
+def decode_payload(data: bytes, encoding: str, prepare=None):
+    """Decode a response body to a tuple (payload, error). Thread-safe."""
+    if not data:
+        return {}, None
+    try:
+        data = decompress(data, encoding)
+    except Exception:
+        log_traceback(f"Unable to decompress {encoding} response", handlers=False)
+        return None, "Unable to decompress response"
+    try:
+        payload = json_loads(data)
+    except Exception:
+        log_traceback("Unable to parse JSON", handlers=False)
+        logging.debug(f"Received: {data[:200]!r}", handlers=False)
+        return None, "Unable to parse response"
+    if prepare is not None:
+        try:
+            payload = prepare(payload)
+        except Exception:
+            log_traceback("Unable to process response", handlers=False)
+            return None, "Unable to process response"
+    return payload, None
+
+
+class ResponseDecoder(QObject):
+    """Decodes large responses in a worker thread."""
+
+    decoded = Signal(object, object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+
+    def start(self, transfer, data: bytes, encoding: str) -> None:
+        self.pool.start(functools.partial(self.run, transfer, data, encoding))
+
+    def run(self, transfer, data: bytes, encoding: str) -> None:
+        start_time = time.perf_counter()
+        payload, error = decode_payload(data, encoding, transfer.prepare)
+        transfer.decode_time = time.perf_counter() - start_time
+        self.decoded.emit(transfer, payload, error)
+
+
 class NebulaAPI:
     def __init__(self):
         self.manager = None
+        self.decoder = None
         self.queries = []
+        self.in_flight = {}
+        self.channels = {}
+        self.lanes = {priority: collections.deque() for priority in RequestPriority}
+        self.running = {priority: 0 for priority in RequestPriority}
+
+    def submit(
+        self,
+        endpoint: str,
+        payload: dict | None = None,
+        timeout: float | None = None,
+        channel=None,
+        prepare=None,
+        priority: RequestPriority | None = None,
+    ) -> NebulaRequest:
+        """Send a request and return its handle without waiting for the reply."""
+        payload = payload or {}
+        if timeout is None:
+            timeout = config.request_timeout
+        if priority is None:
+            priority = ENDPOINT_PRIORITIES.get(endpoint, RequestPriority.INTERACTIVE)
+
+        query = self.dispatch(endpoint, payload, timeout, prepare, priority)
+        if channel is None:
+            return query
+
+        previous = self.channels.get(channel)
+        self.channels[channel] = query
+        query.add_done_callback(functools.partial(self.close_channel, channel, query))
+        if previous is not None and previous.cancel():
+            logging.debug(f"Pending {previous.endpoint} request superseded")
+        return query
+
+    def close_channel(self, channel, query: NebulaRequest, *args) -> None:
+        if self.channels.get(channel) is query:
+            del self.channels[channel]
+
+    def dispatch(
+        self,
+        endpoint: str,
+        payload: dict,
+        timeout: float | None,
+        prepare=None,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+    ) -> NebulaRequest:
+        query = NebulaRequest(endpoint, payload, timeout)
+        key = None
+        if endpoint in COALESCED_ENDPOINTS:
+            key = request_key(endpoint, payload)
+            pending = self.in_flight.get(key)
+            if pending is not None and pending.prepare is not prepare:
+                key = None
+            elif pending is not None and pending.reply is None:
+                # Only requests which have not been sent yet are joined.
+                # A response to a sent one may predate what the caller expects.
+                logging.debug(f"Joining queued {endpoint} request")
+                pending.attach(query)
+                self.promote(pending, priority)
+                return query
+
+        transfer = NebulaTransfer(
+            self, endpoint, payload, key, prepare, priority, timeout
+        )
+        transfer.attach(query)
+        self.enqueue(transfer)
+        return query
+
+    def register(self, transfer: NebulaTransfer) -> None:
+        """Offer the transfer to new identical requests."""
+        if transfer.key is not None:
+            self.in_flight[transfer.key] = transfer
+
+    def enqueue(self, transfer: NebulaTransfer) -> None:
+        """Send the transfer, or queue it if its lane is full."""
+        self.register(transfer)
+        limit = PRIORITY_LIMITS[transfer.priority]
+        if limit is not None and self.running[transfer.priority] >= limit:
+            logging.debug(
+                f"Queueing {transfer.endpoint} request "
+                f"({transfer.priority.name.lower()} lane is full)"
+            )
+            self.lanes[transfer.priority].append(transfer)
+            return
+        self.send(transfer)
 
-    def run(self, endpoint: str, callback, **kwargs):
-        if self.manager is None:
-            self.manager = QNetworkAccessManager()
+    def dequeue(self, transfer: NebulaTransfer) -> None:
+        """Remove a transfer, which has not been sent yet, from its lane."""
+        lane = self.lanes[transfer.priority]
+        if transfer in lane:
+            lane.remove(transfer)
 
-        is_async = " async" if callback == -1 else ""
-        logging.info(f"Executing {endpoint} request{is_async}")
+    def promote(self, transfer: NebulaTransfer, priority: RequestPriority) -> None:
+        """Raise the priority of a transfer a more urgent request waits for."""
+        if priority >= transfer.priority or transfer.reply is not None:
+            return
+        self.dequeue(transfer)
+        transfer.priority = priority
+        self.enqueue(transfer)
+
+    def pump(self) -> None:
+        """Send queued transfers, which fit into their lane limits."""
+        for priority in RequestPriority:
+            lane = self.lanes[priority]
+            limit = PRIORITY_LIMITS[priority]
+            while lane and (limit is None or self.running[priority] < limit):
+                self.send(lane.popleft())
+
+    def setup(self) -> None:
+        if self.manager is not None:
+            return
+        self.manager = QNetworkAccessManager()
+        self.decoder = ResponseDecoder()
+        self.decoder.decoded.connect(self.on_decoded)
+
+    def warm_up(self) -> None:
+        """Open a connection to the server in advance."""
+        self.setup()
+        url = QUrl(config.site.host)
+        host = url.host()
+        if url.scheme() == "https":
+            if not QSslSocket.supportsSsl():
+                return
+            ssl_config = QSslConfiguration.defaultConfiguration()
+            if config.http2:
+                ssl_config.setAllowedNextProtocols(
+                    [QSslConfiguration.ALPNProtocolHTTP2, b"http/1.1"]
+                )
+            self.manager.connectToHostEncrypted(host, url.port(443), ssl_config)
+        else:
+            self.manager.connectToHost(host, url.port(80))
+        logging.debug(f"Connecting to {host}")
+
+    def send(self, transfer: NebulaTransfer) -> None:
+        self.setup()
 
-        endpoint = "/api/" + endpoint
-        data = json.dumps(kwargs).encode("ascii")
+        endpoint = transfer.endpoint
+        logging.info(f"Executing {endpoint} request")
+
+        data = json_dumps(transfer.payload)
         access_token = config.site.token
         authorization = bytes(f"Bearer {access_token}", "ascii")
         user_agent = bytes(f"firefly/{FIREFLY_VERSION}", "ascii")
 
-        request = QNetworkRequest(QUrl(config.site.host + endpoint))
+        request = QNetworkRequest(QUrl(config.site.host + "/api/" + endpoint))
         request.setRawHeader(b"Content-Type", b"application/json")
+        request.setRawHeader(b"Accept-Encoding", ACCEPT_ENCODING)
         request.setRawHeader(b"User-Agent", user_agent)
         request.setRawHeader(b"Authorization", authorization)
         request.setRawHeader(b"X-Client-Id", bytes(config.client_id, "ascii"))
-
+        request.setPriority(QT_PRIORITIES[transfer.priority])
+        request.setAttribute(
+            QNetworkRequest.Attribute.Http2AllowedAttribute, config.http2
+        )
+        if transfer.timeout:
+            request.setTransferTimeout(int(transfer.timeout * 1000))
+        if config.compress_requests and len(data) > COMPRESSION_THRESHOLD:
+            data = compress(data, "gzip")
+            request.setRawHeader(b"Content-Encoding", b"gzip")
+
+        transfer.request_bytes = len(data)
+        transfer.sent_at = time.perf_counter()
         try:
-            query = self.manager.post(request, data)
-            if callback != -1:
-                query.finished.connect(functools.partial(self.handler, query, callback))
-            self.queries.append(query)
+            transfer.reply = self.manager.post(request, data)
         except Exception:
             log_traceback()
-            if callback:
-                r = NebulaResponse(400, "Unable to send request")
-                if callback == -1:
-                    return r
-                else:
-                    callback(r)
+            self.finish(transfer, NebulaResponse(400, "Unable to send request"))
             return
 
+        transfer.running = True
+        self.running[transfer.priority] += 1
+        transfer.reply.metaDataChanged.connect(
+            functools.partial(self.on_first_byte, transfer)
+        )
+        transfer.reply.finished.connect(functools.partial(self.handler, transfer))
+
+    def on_first_byte(self, transfer: NebulaTransfer) -> None:
+        if transfer.first_byte_at is None:
+            transfer.first_byte_at = time.perf_counter()
+
+    def record_metrics(self, transfer: NebulaTransfer, status: int) -> None:
+        if transfer.sent_at is None:
+            return
+        if status == 499:
+            # Aborted transfers would skew the timings, only count them
+            api_metrics.record(transfer.endpoint, status)
+            return
+
+        def ms(start, end):
+            if start is None or end is None:
+                return None
+            return (end - start) * 1000
+
+        total = ms(transfer.sent_at, transfer.finished_at)
+        decode = None
+        if transfer.decode_time is not None:
+            decode = transfer.decode_time * 1000
+        api_metrics.record(
+            transfer.endpoint,
+            status,
+            queue_wait=ms(transfer.created_at, transfer.sent_at),
+            ttfb=ms(transfer.sent_at, transfer.first_byte_at),
+            total=total,
+            decode=decode,
+            request_bytes=transfer.request_bytes,
+            response_bytes=transfer.response_bytes,
+        )
+        if total is not None:
+            logging.debug(
+                f"{transfer.endpoint} request finished in {total:.0f} ms "
+                f"({transfer.response_bytes} bytes)"
+            )
+
+    def release(self, transfer: NebulaTransfer) -> None:
+        """Stop offering the transfer to new requests."""
+        if transfer.key is not None and self.in_flight.get(transfer.key) is transfer:
+            del self.in_flight[transfer.key]
+
+    def close(self, transfer: NebulaTransfer) -> None:
+        """Free the lane slot of a finished transfer and send queued ones."""
+        if not transfer.running:
+            return
+        transfer.running = False
+        self.running[transfer.priority] -= 1
+        self.pump()
+
+    def finish(self, transfer: NebulaTransfer, response: NebulaResponse) -> None:
+        self.release(transfer)
+        self.record_metrics(transfer, response.response)
+        transfer.finish(response)
+
+    def run(self, endpoint: str, callback, **kwargs):
+        """Execute an API request (synchronously if callback is -1)."""
+        query = self.submit(endpoint, kwargs)
         if callback == -1:
-            while not query.isFinished():
-                time.sleep(0.0001)
-                QApplication.processEvents()
-            return self.handler(query, -1)
+            return query.result()
+        query.add_done_callback(callback)
+        return query
+
+    def cancel_all(self) -> None:
+        """Abort all pending requests."""
+        for query in list(self.queries):
+            query.cancel()
+
+    def handler(self, transfer: NebulaTransfer):
+        response = transfer.reply
+        response.deleteLater()
+        # The reply must not be touched after this point
+        transfer.finished = True
+        transfer.finished_at = time.perf_counter()
+        self.close(transfer)
+        if not transfer.handles:
+            self.release(transfer)
+            self.record_metrics(transfer, 499)
+            return
 
-    def handler(self, response, callback):
-        status = response.attribute(QNetworkRequest.HttpStatusCodeAttribute)
-        bytes_string = response.readAll()
-        data = str(bytes_string, "utf-8")
+        transfer.status = response.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        transfer.url = response.request().url().toString()
+        transfer.timed_out = (
+            response.error() == QNetworkReply.NetworkError.OperationCanceledError
+        )
+        encoding = response.rawHeader(b"Content-Encoding").data().decode("ascii")
+        encoding = encoding.strip().lower()
+        data = response.readAll().data()
+        transfer.response_bytes = len(data)
+
+        if transfer.prepare is not None or len(data) > DECODE_THREAD_THRESHOLD:
+            self.decoder.start(transfer, data, encoding)
+            return
 
-        request = response.request()
-        url = request.url().toString()
+        start_time = time.perf_counter()
+        payload, error = decode_payload(data, encoding)
+        transfer.decode_time = time.perf_counter() - start_time
+        self.on_decoded(transfer, payload, error)
 
-        if data:
-            try:
-                payload = json.loads(data)
-            except Exception:
-                log_traceback("Unable to parse JSON")
-                print(data)
-                return NebulaResponse(500, f"Unable to parse response from {url}")
-        else:
-            payload = {}
+    def on_decoded(self, transfer: NebulaTransfer, payload, error) -> None:
+        if not transfer.handles:
+            self.release(transfer)
+            self.record_metrics(transfer, 499)
+            return
+
+        if error:
+            result = NebulaResponse(500, f"{error} from {transfer.url}")
+            self.finish(transfer, result)
+            return
 
-        message = payload.get("detail", "")
-        payload.pop("detail", None)
+        message = payload.pop("detail", "")
+        status = transfer.status
 
         if status is None:
-            status = 500
-            message = "Unable to connect to server"
+            if transfer.timed_out:
+                status = 408
+                message = f"{transfer.endpoint} request timed out"
+            else:
+                status = 500
+                message = "Unable to connect to server"
         elif status > 399:
-            message = f"ERROR {status} from {url}\n\n{message}"
+            message = f"ERROR {status} from {transfer.url}\n\n{message}"
 
-        result = NebulaResponse(status, message, **payload)
-        self.queries.remove(response)
-        if callback and callback != -1:
-            callback(result)
-        return result
+        self.finish(transfer, NebulaResponse(status, message, **payload))
 
     def __getattr__(self, endpoint: str):
         def wrapper(callback=-1, **kwargs):
@@ -66,6 +66,7 @@ class FireflyApplication(QApplication):
         if i is None:
             sys.exit(0)
         config.set_site(i)
+        api.warm_up()
 
         self.app_state_path = os.path.join(
             app_dir, f"ffdata.{config.site.name}.appstate"
@@ -110,6 +111,14 @@ class FireflyApplication(QApplication):
         self.on_exit()
 
     def on_exit(self):
+        # Changes requested, but not loaded yet, are missing in the cache.
+        # Without a complete startup sync, older changes may be missing too.
+        synced = asset_cache.synced and not asset_cache.busy
+        api.cancel_all()
+        if synced and self.main_window.listener:
+            if self.main_window.listener.last_timestamp:
+                # Seismic kept the cache up to date until now
+                asset_cache.mark_synced(self.main_window.listener.last_timestamp)
         asset_cache.save()
         if not self.main_window.listener:
             return
@@ -0,0 +1,92 @@
+"""JSON serialization and HTTP compression helpers.
+
+The fastest available JSON library is used (orjson, msgspec, or the
+standard library json module as a fallback). All functions work with
+bytes, so there is no need to create intermediate strings.
+"""
+
+import functools
+import gzip
+import json
+
+from typing import Any
+
+try:
+    import orjson
+
+    has_orjson = True
+except ImportError:
+    has_orjson = False
+
+try:
+    import msgspec
+
+    has_msgspec = True
+except ImportError:
+    has_msgspec = False
+
+try:
+    import zstandard
+
+    has_zstd = True
+except ImportError:
+    has_zstd = False
+
+
+#
+# JSON
+#
+
+
+def _stdlib_dumps(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _stdlib_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+if has_orjson:
+    json_codec = "orjson"
+    json_dumps = functools.partial(orjson.dumps, option=orjson.OPT_NON_STR_KEYS)
+    json_loads = orjson.loads
+elif has_msgspec:
+    json_codec = "msgspec"
+    json_dumps = msgspec.json.encode
+    json_loads = msgspec.json.decode
+else:
+    json_codec = "json"
+    json_dumps = _stdlib_dumps
+    json_loads = _stdlib_loads
+
+
+#
+# Compression
+#
+
+if has_zstd:
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+    ACCEPT_ENCODING = b"zstd, gzip"
+else:
+    ACCEPT_ENCODING = b"gzip"
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress data using the given content encoding."""
+    if encoding == "zstd" and has_zstd:
+        return _zstd_compressor.compress(data)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=5)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def decompress(data: bytes, encoding: str | None) -> bytes:
+    """Decompress data received with the given Content-Encoding."""
+    if not encoding or encoding == "identity":
+        return data
+    if encoding == "zstd" and has_zstd:
+        return _zstd_decompressor.decompressobj().decompress(data)
+    if encoding in ["gzip", "x-gzip"]:
+        return gzip.decompress(data)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
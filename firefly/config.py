@@ -18,6 +18,51 @@ class FireflyConfig(BaseModel):
 
     client_id: str = Field(default_factory=get_guid, title="Client ID")
     debug: bool = Field(False, title="Debug mode")
+    request_timeout: float = Field(
+        30,
+        title="Request timeout",
+        description="Maximum time (in seconds) to wait for an API response",
+    )
+    compress_requests: bool = Field(
+        False,
+        title="Compress requests",
+        description="Send large request bodies gzip compressed. "
+        "Enable only if the server accepts compressed requests.",
+    )
+    http2: bool = Field(
+        True,
+        title="HTTP/2",
+        description="Use HTTP/2 if the server supports it, "
+        "so concurrent requests share a single connection.",
+    )
+
+    seismic_frame_budget: float = Field(
+        0.02,
+        title="Seismic frame budget",
+        description="Maximum time (in seconds) spent processing Seismic messages "
+        "at once. Remaining messages are processed after the GUI is updated.",
+    )
+
+    seismic_coalesce_window: float = Field(
+        0.05,
+        title="Seismic coalescing window",
+        description="Minimum time (in seconds) between processing batches "
+        "of Seismic messages. Changes received within the window are merged.",
+    )
+
+    asset_cache_size: int = Field(
+        10000,
+        title="Asset cache size",
+        description="Maximum number of assets kept in memory. 0 means no limit. "
+        "Evicted assets are loaded back from the disk cache.",
+    )
+
+    asset_cache_memory: int = Field(
+        0,
+        title="Asset cache memory",
+        description="Approximate memory (in megabytes) used by assets "
+        "kept in memory. 0 means no limit.",
+    )
 
     sites: list[SiteConfiguration] = Field(
         default_factory=list,
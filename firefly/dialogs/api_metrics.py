@@ -0,0 +1,134 @@
+from nxtools import logging, log_traceback
+
+from firefly.metrics import api_metrics
+from firefly.objects import asset_cache
+from firefly.qt import (
+    Qt,
+    QDialog,
+    QDialogButtonBox,
+    QFileDialog,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QTimer,
+    QVBoxLayout,
+    app_skin,
+)
+
+COLUMNS = [
+    ("Endpoint", None, None),
+    ("Count", "count", None),
+    ("Errors", "errors", None),
+    ("Queue p50", "queue_wait", "p50"),
+    ("TTFB p50", "ttfb", "p50"),
+    ("TTFB p90", "ttfb", "p90"),
+    ("Total p50", "total", "p50"),
+    ("Total p90", "total", "p90"),
+    ("Total p99", "total", "p99"),
+    ("Total max", "total", "max"),
+    ("Decode p50", "decode", "p50"),
+    ("Decode p90", "decode", "p90"),
+    ("Request kB", "request_bytes", "mean"),
+    ("Response kB", "response_bytes", "mean"),
+]
+
+
+def format_value(key, value):
+    if key.endswith("_bytes"):
+        return f"{value / 1024:.1f}"
+    return f"{value:.1f}"
+
+
+class ApiMetricsDialog(QDialog):
+    def __init__(self, parent):
+        super(ApiMetricsDialog, self).__init__(parent)
+        self.setWindowTitle("API metrics")
+        self.setStyleSheet(app_skin)
+
+        self.table = QTableWidget(self)
+        self.table.setColumnCount(len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([c[0] for c in COLUMNS])
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.ResizeToContents
+        )
+
+        buttons = QDialogButtonBox(Qt.Orientation.Horizontal, self)
+        btn_export = QPushButton("Export...")
+        btn_export.clicked.connect(self.on_export)
+        buttons.addButton(btn_export, QDialogButtonBox.ButtonRole.ActionRole)
+        btn_reset = QPushButton("Reset")
+        btn_reset.clicked.connect(self.on_reset)
+        buttons.addButton(btn_reset, QDialogButtonBox.ButtonRole.ResetRole)
+        buttons.addButton(QDialogButtonBox.StandardButton.Close)
+        buttons.rejected.connect(self.close)
+
+        self.cache_label = QLabel(self)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.table, 1)
+        layout.addWidget(self.cache_label)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+        self.resize(1100, 400)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.load)
+        self.timer.start(1000)
+        self.load()
+
+    def load(self):
+        summary = api_metrics.summary()
+        self.table.setRowCount(len(summary))
+        for row, (endpoint, data) in enumerate(summary.items()):
+            for col, (title, key, stat) in enumerate(COLUMNS):
+                if key is None:
+                    text = endpoint
+                elif stat is None:
+                    text = str(data[key])
+                else:
+                    text = format_value(key, data[key][stat])
+                item = QTableWidgetItem(text)
+                if key is not None:
+                    item.setTextAlignment(
+                        Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+                    )
+                self.table.setItem(row, col, item)
+
+        stats = asset_cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups * 100 if lookups else 0
+        self.cache_label.setText(
+            f"Asset cache: {stats['entries']} assets"
+            f" ({stats['bytes'] / 1024 / 1024:.1f} MB),"
+            f" {stats['hits']} hits, {stats['misses']} misses"
+            f" ({hit_rate:.1f}% hit rate), {stats['evictions']} evictions"
+        )
+
+    def on_reset(self):
+        api_metrics.reset()
+        self.load()
+
+    def on_export(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export API metrics", "api-metrics.json", "JSON files (*.json)"
+        )
+        if not path:
+            return
+        try:
+            api_metrics.export(path)
+        except Exception:
+            log_traceback("Unable to export API metrics")
+            return
+        logging.info(f"API metrics exported to {path}")
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super(ApiMetricsDialog, self).closeEvent(event)
+
+
+def show_api_metrics_dialog(parent=None):
+    dlg = ApiMetricsDialog(parent)
+    dlg.exec()
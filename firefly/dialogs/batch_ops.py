@@ -4,6 +4,7 @@ from nxtools import logging
 
 from firefly.api import api
 from firefly.metadata import meta_types
+from firefly.objects import asset_cache
 from firefly.enum import MetaClass
 from firefly.widgets import MetaEditor
 from firefly.qt import (
@@ -98,6 +99,8 @@ class BatchOpsDialog(QDialog):
 
         if not response:
             logging.error(response.message)
+        else:
+            asset_cache.update_saved(response, [a.id for a in self.objects])
 
         self.response = True
         self.close()
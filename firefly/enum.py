@@ -88,6 +88,12 @@ class ServiceState(enum.IntEnum):
     KILL = 4
 
 
+class RequestPriority(enum.IntEnum):
+    CRITICAL = 0  # Playout control. Never waits for other requests.
+    INTERACTIVE = 1  # Direct response to the operator action.
+    BACKGROUND = 2  # Cache refreshes, reloads and prefetches.
+
+
 class Colors(enum.Enum):
     TEXT_NORMAL = "#f0f0f0"
     TEXT_FADED = "#a0a0a0"
@@ -6,8 +6,9 @@ import websocket
 from typing import Any
 from nxtools import logging, log_traceback
 
+from firefly.codec import json_loads
 from firefly.config import config
-from firefly.qt import QThread
+from firefly.qt import QThread, Signal
 
 
 if config.debug:
@@ -15,12 +16,40 @@ if config.debug:
 
 
 class SeismicMessage:
-    def __init__(self, **payload):
-        self.timestamp = time.time()
-        self.site_name = config.site.name
-        self.host = payload.get("host", "server")
-        self.topic = payload.get("topic", "unknown")
-        self.data = payload.get("data", {})
+    """Immutable seismic message."""
+
+    __slots__ = (
+        "timestamp",
+        "site_name",
+        "host",
+        "topic",
+        "data",
+        "id_channel",
+        "object_type",
+        "ids",
+    )
+
+    def __init__(
+        self,
+        topic: str = "unknown",
+        data: dict[str, Any] | None = None,
+        host: str = "server",
+        timestamp: float | None = None,
+        **kwargs,
+    ):
+        data = data or {}
+        setattr_ = super().__setattr__
+        setattr_("timestamp", timestamp or time.time())
+        setattr_("site_name", config.site.name)
+        setattr_("host", host)
+        setattr_("topic", topic)
+        setattr_("data", data)
+        setattr_("id_channel", data.get("id_channel"))
+        setattr_("object_type", data.get("object_type"))
+        setattr_("ids", frozenset(data.get("objects") or []))
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError("SeismicMessage is immutable")
 
     def __getitem__(self, key: str) -> Any:
         return self.data.get(key)
@@ -34,15 +63,60 @@ class SeismicMessage:
         return f"<SeismicMessage {self.topic}>"
 
 
+def coalesce_messages(messages: list[SeismicMessage]) -> list[SeismicMessage]:
+    """Merge a batch of seismic messages."""
+    groups: dict[Any, list[SeismicMessage]] = {}
+    for i, message in enumerate(messages):
+        if message.topic == "objects_changed":
+            key = (message.topic, message.object_type)
+        elif message.topic == "playout_status":
+            key = (message.topic, message.id_channel)
+        elif message.topic == "job_progress":
+            key = (message.topic, message["id"])
+        else:
+            key = i
+        groups.setdefault(key, []).append(message)
+
+    result = []
+    for key, group in groups.items():
+        latest = group[-1]
+        if len(group) > 1 and latest.topic == "objects_changed":
+            objects = {}
+            metas = []
+            for message in group:
+                objects.update(dict.fromkeys(message["objects"] or []))
+                metas.extend(message["meta"] or [])
+            data = {**latest.data, "objects": list(objects)}
+            if metas:
+                data["meta"] = metas
+            latest = SeismicMessage(
+                topic=latest.topic,
+                data=data,
+                host=latest.host,
+                timestamp=latest.timestamp,
+            )
+        result.append(latest)
+    return result
+
+
 class SeismicListener(QThread):
-    def __init__(self):
+    """Receives Seismic messages in a background thread. Not started automatically."""
+
+    messages_pending = Signal()
+    reconnected = Signal(float)
+
+    def __init__(self, topics=None, channels=None):
         QThread.__init__(self, None)
         self.site_name = config.site.name
+        self.topics = frozenset(topics or ["*"])
+        self.channels = frozenset(channels) if channels else None
         self.should_run = True
         self.active = False
+        self.connected = False
         self.last_msg = time.time()
+        self.last_timestamp = None
         self.queue = queue.Queue()
-        self.start()
+        self.wake_pending = False
 
     def run(self):
         addr = config.site.host.replace("http", "ws", 1) + "/ws"
@@ -64,35 +138,87 @@ class SeismicListener(QThread):
 
     def on_open(self, *args):
         logging.goodnews("[LISTENER] connected", handlers=False)
+        self.connected = True
+        self.send_subscriptions()
+        if self.last_timestamp is not None:
+            # Messages sent while we were disconnected are lost.
+            # Let the receiver find out what has changed since the last one.
+            self.reconnected.emit(self.last_timestamp)
+
+    def send_subscriptions(self):
         self.ws.send(
             json.dumps(
                 {
                     "topic": "auth",
                     "token": config.site.token,
-                    "subscribe": ["*"],
+                    "subscribe": sorted(self.topics),
                 }
             )
         )
 
+    def subscribe(self, topics, channels=None):
+        """Change the subscribed topics and playout channels."""
+        topics = frozenset(topics or ["*"])
+        self.channels = frozenset(channels) if channels else None
+        if topics == self.topics:
+            return
+        self.topics = topics
+        logging.debug(
+            f"[LISTENER] Subscribing to {', '.join(sorted(topics))}", handlers=False
+        )
+        if not self.connected:
+            return
+        try:
+            self.send_subscriptions()
+        except Exception:
+            log_traceback("[LISTENER] Unable to update subscriptions", handlers=False)
+
     def on_message(self, *args):
         data = args[-1]
         if not self.active:
             logging.goodnews("[LISTENER] Got first message!", handlers=False)
             self.active = True
         try:
-            original_payload = json.loads(data)
-            message = SeismicMessage(**original_payload)
+            payload = json_loads(data)
+            topic = payload.get("topic", "unknown")
+            message_data = payload.get("data") or {}
         except Exception:
             log_traceback(handlers=False)
             logging.debug(f"[LISTENER] Malformed message: {data}", handlers=False)
             return
 
         self.last_msg = time.time()
+        self.last_timestamp = payload.get("timestamp", self.last_msg)
+
+        # Drop messages the GUI would throw away, before the message
+        # object is created and passed to the GUI thread.
+
+        if "*" not in self.topics and topic not in self.topics:
+            return
 
-        if message.data and message.data.get("initiator", None) == config.client_id:
+        if message_data.get("initiator", None) == config.client_id:
             return
 
+        if (
+            self.channels is not None
+            and topic == "playout_status"
+            and message_data.get("id_channel") not in self.channels
+        ):
+            return
+
+        message = SeismicMessage(
+            topic=topic,
+            data=message_data,
+            host=payload.get("host", "server"),
+        )
         self.queue.put(message)
+        if not self.wake_pending:
+            self.wake_pending = True
+            self.messages_pending.emit()
+
+    def acknowledge(self):
+        """Allow the next message to wake up the receiver."""
+        self.wake_pending = False
 
     def on_error(self, *args):
         error = args[-1]
@@ -100,6 +226,7 @@ class SeismicListener(QThread):
 
     def on_close(self, *args):
         self.active = False
+        self.connected = False
         if self.should_run:
             logging.warning("[LISTENER] connection interrupted", handlers=False)
 
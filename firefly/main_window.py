@@ -9,7 +9,7 @@ import firefly
 from firefly.api import api
 from firefly.config import config
 from firefly.menu import create_menu
-from firefly.listener import SeismicListener
+from firefly.listener import SeismicListener, coalesce_messages
 from firefly.objects import asset_cache
 from firefly.version import FIREFLY_VERSION
 
@@ -39,6 +39,14 @@ from firefly.qt import (
 )
 
 
+# Topics handled by the main window itself
+MAIN_WINDOW_TOPICS = ["objects_changed", "config_changed"]
+
+# Seconds subtracted from the last known timestamp when synchronizing
+# changes (at startup and after reconnect), to cover changes in transit.
+SEISMIC_SYNC_MARGIN = 5
+
+
 class FireflyMainWidget(QWidget):
     def __init__(self, main_window):
         super(FireflyMainWidget, self).__init__(main_window)
@@ -156,6 +164,8 @@ class FireflyMainWindow(QMainWindow):
         super(FireflyMainWindow, self).__init__()
 
         self.subscribers = []
+        self.listener = None
+        self.focused_asset_id = None
         asset_cache.api = api
         asset_cache.handler = self.on_assets_update
 
@@ -173,13 +183,22 @@ class FireflyMainWindow(QMainWindow):
         self.setWindowTitle(title)
         self.setAttribute(Qt.WidgetAttribute.WA_AlwaysShowToolTips)
         logging.handlers = [self.log_handler]
-        self.listener = SeismicListener()
+        self.listener = SeismicListener(*self.seismic_subscriptions())
+        self.listener.messages_pending.connect(self.on_seismic_messages)
+        self.listener.reconnected.connect(self.on_seismic_reconnected)
+        self.seismic_backlog = []
+        self.seismic_last_dispatch = 0
+        self.seismic_dispatch_timer = QTimer(self)
+        self.seismic_dispatch_timer.setSingleShot(True)
+        self.seismic_dispatch_timer.timeout.connect(self.dispatch_seismic)
 
         self.seismic_timer = QTimer(self)
         self.seismic_timer.timeout.connect(self.on_seismic_timer)
-        self.seismic_timer.start(40)
+        self.seismic_timer.start(1000)
+        self.listener.start()
 
         self.load_window_state()
+        QTimer.singleShot(0, self.sync_asset_cache)
 
         for playout_channel in firefly.settings.playout_channels:
             if (
@@ -289,11 +308,30 @@ class FireflyMainWindow(QMainWindow):
         if type(obj) == list:
             obj = obj[0]
         if obj.object_type == "item":
+            if obj["id_asset"]:
+                self.focus_asset(obj["id_asset"])
+                return
             obj = obj.asset
+        # Drop pending focus_asset requests, this object is focused now
+        self.focused_asset_id = None
         self.detail.focus(obj)
         if self.scheduler:
             self.scheduler.focus(obj)
 
+    def focus_asset(self, id_asset):
+        """Focus an asset as soon as it is loaded.
+
+        When another asset is focused in the meantime
+        (e.g. while arrowing through a list), the request is dropped.
+        """
+        self.focused_asset_id = id_asset
+
+        def on_ready(assets):
+            if self.focused_asset_id == id_asset:
+                self.focus(assets[0])
+
+        asset_cache.when_ready([id_asset], on_ready)
+
     #
     # Menu actions
     #
@@ -355,6 +393,7 @@ class FireflyMainWindow(QMainWindow):
                 if hasattr(action, "id_channel") and action.id_channel == id_channel:
                     action.setChecked(True)
             self.id_channel = id_channel
+            self.update_subscriptions()
             if self.scheduler:
                 self.scheduler.on_channel_changed()
             if self.rundown:
@@ -413,24 +452,106 @@ class FireflyMainWindow(QMainWindow):
                 "[MAIN WINDOW] No seismic message received. Something may be wrong"
             )
             self.listener.last_msg = time.time()
+        if not self.listener.queue.empty():
+            # Do not leave messages waiting if a wake-up signal got lost
+            self.on_seismic_messages()
+
+    def on_seismic_messages(self):
+        """Schedule processing of pending seismic messages.
+
+        A message arriving after a quiet period is processed immediately.
+        During bursts, messages are processed at most once per coalescing
+        window, so subscribers receive one consolidated update instead
+        of a stream of small ones.
+        """
+        self.listener.acknowledge()
+        if self.seismic_dispatch_timer.isActive():
+            return
+        next_dispatch = self.seismic_last_dispatch + config.seismic_coalesce_window
+        delay = next_dispatch - time.perf_counter()
+        if delay > 0:
+            self.seismic_dispatch_timer.start(int(delay * 1000) + 1)
+            return
+        self.dispatch_seismic()
+
+    def dispatch_seismic(self):
+        """Process pending seismic messages.
+
+        When the frame budget is exhausted, the rest of the messages is
+        processed in the next event loop iteration, so the GUI stays
+        responsive during message storms.
+        """
+        self.seismic_last_dispatch = time.perf_counter()
+        messages = self.seismic_backlog
         while True:
             try:
-                message = self.listener.queue.get_nowait()
+                messages.append(self.listener.queue.get_nowait())
             except queue.Empty:
-                return
-            else:
+                break
+        messages = coalesce_messages(messages)
+
+        deadline = time.perf_counter() + config.seismic_frame_budget
+        for i, message in enumerate(messages):
+            try:
                 self.seismic_handler(message)
+            except Exception:
+                log_traceback(f"Unable to handle {message}")
+            if time.perf_counter() > deadline:
+                self.seismic_backlog = messages[i + 1 :]
+                if self.seismic_backlog:
+                    QTimer.singleShot(0, self.dispatch_seismic)
+                return
+        self.seismic_backlog = []
+
+    def sync_asset_cache(self):
+        """Update cached assets changed while Firefly was not running."""
+        if (since := asset_cache.synced_until()) is None:
+            asset_cache.synced = True
+            return
+        asset_cache.sync(since - SEISMIC_SYNC_MARGIN, self.on_asset_cache_synced)
+
+    def on_asset_cache_synced(self, ids):
+        asset_cache.synced = True
+
+    def on_seismic_reconnected(self, since):
+        """Catch up with changes made while the listener was disconnected.
+
+        Changed assets are updated incrementally. Events cannot be
+        queried by modification time, so the rundown and the scheduler
+        of the current channel are reloaded.
+        """
+        logging.info("[MAIN WINDOW] Seismic reconnected. Synchronizing changes")
+        asset_cache.sync(since - SEISMIC_SYNC_MARGIN)
+        if self.rundown:
+            self.rundown.load()
+        if self.scheduler:
+            self.scheduler.load()
 
     def add_subscriber(self, module, methods):
         self.subscribers.append([module, frozenset(methods)])
+        self.update_subscriptions()
+
+    def seismic_subscriptions(self):
+        """Return topics and playout channels the window needs to receive."""
+        topics = set(MAIN_WINDOW_TOPICS)
+        for module, methods in self.subscribers:
+            topics.update(methods)
+        channels = None
+        if id_channel := getattr(self, "id_channel", None):
+            channels = [id_channel]
+        return topics, channels
+
+    def update_subscriptions(self):
+        if self.listener:
+            self.listener.subscribe(*self.seismic_subscriptions())
 
     def seismic_handler(self, message):
-        if (
-            message.method == "objects_changed"
-            and message.data["object_type"] == "asset"
-        ):
-            objects = message.data["objects"]
+        if message.topic == "objects_changed" and message.object_type == "asset":
+            objects = message.ids
             logging.debug(f"[MAIN WINDOW] {len(objects)} asset(s) have been changed")
+            # The server may include the changed metadata in the message
+            if metas := message["meta"]:
+                objects = objects - asset_cache.update(metas)
             asset_cache.request([[aid, message.timestamp + 1] for aid in objects])
             return
 
@@ -4,6 +4,7 @@ import firefly
 
 from firefly.config import config
 from firefly.dialogs.about import show_about_dialog
+from firefly.dialogs.api_metrics import show_api_metrics_dialog
 from firefly.qt import (
     QAction,
     QActionGroup,
@@ -183,6 +184,12 @@ def create_menu(wnd):
     wnd.action_debug.triggered.connect(wnd.toggle_debug_mode)
 
     menu_help.addAction(wnd.action_debug)
+
+    action_api_metrics = QAction("API metrics", wnd)
+    action_api_metrics.setStatusTip("Show API request timings")
+    action_api_metrics.triggered.connect(partial(show_api_metrics_dialog, wnd))
+    menu_help.addAction(action_api_metrics)
+
     menu_help.addSeparator()
 
     action_about = QAction("&About", wnd)
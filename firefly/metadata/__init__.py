@@ -1,7 +1,7 @@
-import copy
 import functools
 
 from collections import defaultdict
+from collections.abc import Mapping
 from typing import Any
 from pydantic import BaseModel
 from nxtools import unaccent
@@ -109,6 +109,35 @@ def _folder_metaset(id_folder):
     return firefly.settings.get_folder(id_folder).fields
 
 
+class FolderMetaTypes(Mapping):
+    """Meta types of a folder.
+
+    Site-wide meta types are shared by all folders. Only the meta types
+    overridden by the folder fields are copied, on first access.
+    """
+
+    def __init__(self, base: dict[str, MetaType], overrides: dict[str, dict]):
+        self.base = base
+        self.overrides = overrides
+        self.overridden: dict[str, MetaType] = {}
+
+    def __getitem__(self, name: str) -> MetaType:
+        if name not in self.overrides:
+            return self.base[name]
+        try:
+            return self.overridden[name]
+        except KeyError:
+            mt = self.base[name].copy(update=self.overrides[name])
+            self.overridden[name] = mt
+            return mt
+
+    def __iter__(self):
+        return iter(self.base)
+
+    def __len__(self):
+        return len(self.base)
+
+
 class MetaTypes(metaclass=CachedObject):
     def __init__(self, id_folder=None):
         self.id_folder = id_folder
@@ -117,20 +146,26 @@ class MetaTypes(metaclass=CachedObject):
     @property
     def meta_types(self):
         if not self._meta_types:
+            if self.id_folder:
+                self._meta_types = FolderMetaTypes(
+                    meta_types.meta_types,
+                    {
+                        ffield.name: ffield.dict()
+                        for ffield in _folder_metaset(self.id_folder)
+                    },
+                )
+                return self._meta_types
+
+            if self is not meta_types:
+                self._meta_types = meta_types.meta_types
+                return self._meta_types
+
             self._meta_types = {}
             for name, mset in firefly.settings.metatypes.items():
                 mt = MetaType(name=name, **mset)
                 if mt.default is None:
                     mt.default = TYPE_DEFAULTS[mt.type]
                 self._meta_types[name] = mt
-
-            if self.id_folder:
-                self._meta_types = copy.deepcopy(self._meta_types)
-                for ffield in _folder_metaset(self.id_folder):
-                    mt = self._meta_types[ffield.name]
-                    for k, v in ffield.dict().items():
-                        mt.__setattr__(k, v)
-                    self._meta_types[ffield.name] = mt
         return self._meta_types
 
     def __contains__(self, name):
@@ -145,7 +180,38 @@ class MetaTypes(metaclass=CachedObject):
 
 meta_types = MetaTypes()
 
+# Metadata lookups resolved per (id_folder, key)
+_field_defaults: dict[tuple[Any, str], tuple[str, Any]] = {}
+_normalized_keys: dict[str, str] = {}
+
+
+def normalize_key(key: str) -> str:
+    try:
+        return _normalized_keys[key]
+    except KeyError:
+        result = _normalized_keys[key] = key.lower().strip()
+        return result
+
+
+def field_default(id_folder, key: str) -> tuple[str, Any]:
+    """Return the normalized key and its default value in the given folder.
+
+    Resolved once per folder and key, so objects do not need to normalize
+    the key and consult the folder meta types on every lookup.
+    """
+    try:
+        return _field_defaults[id_folder, key]
+    except KeyError:
+        pass
+    name = normalize_key(key)
+    meta_type = MetaTypes(id_folder)[name]
+    default = None if meta_type is None else meta_type.default
+    result = _field_defaults[id_folder, key] = (name, default)
+    return result
+
 
 def clear_cs_cache():
     MetaTypes.clear_cache()
+    meta_types._meta_types = None
     ClassificationScheme.clear_cache()
+    _field_defaults.clear()
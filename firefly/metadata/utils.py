@@ -55,7 +55,6 @@ def tree_indent(data):
 class CachedObject(type):
     _cache = None
 
-    @classmethod
     def clear_cache(cls):
         cls._cache = None
 
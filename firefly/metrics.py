@@ -0,0 +1,140 @@
+"""API request instrumentation.
+
+Keeps rolling windows of recent request timings and sizes per endpoint,
+so the latency perceived by the operator can be broken down into
+queueing, network and decoding time.
+"""
+
+import collections
+import json
+import time
+
+from typing import Any
+
+# Upper bounds (in milliseconds) of the histogram buckets
+HISTOGRAM_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+TIMING_KEYS = ["queue_wait", "ttfb", "total", "decode"]
+SIZE_KEYS = ["request_bytes", "response_bytes"]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the percentile of already sorted values."""
+    if not values:
+        return 0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class RollingHistogram:
+    """Window of the most recent samples."""
+
+    def __init__(self, size: int = 500):
+        self.samples = collections.deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+
+    def summary(self) -> dict[str, float]:
+        values = sorted(self.samples)
+        return {
+            "count": len(values),
+            "min": values[0] if values else 0,
+            "mean": sum(values) / len(values) if values else 0,
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": values[-1] if values else 0,
+        }
+
+    def buckets(self, bounds: list[float] = HISTOGRAM_BUCKETS) -> dict[str, int]:
+        result = {f"<={bound}": 0 for bound in bounds}
+        result[f">{bounds[-1]}"] = 0
+        for value in self.samples:
+            for bound in bounds:
+                if value <= bound:
+                    result[f"<={bound}"] += 1
+                    break
+            else:
+                result[f">{bounds[-1]}"] += 1
+        return result
+
+
+class EndpointMetrics:
+    """Collected samples of a single API endpoint."""
+
+    def __init__(self, endpoint: str, size: int = 500):
+        self.endpoint = endpoint
+        self.count = 0
+        self.errors = 0
+        self.statuses = collections.Counter()
+        self.histograms = {
+            key: RollingHistogram(size) for key in TIMING_KEYS + SIZE_KEYS
+        }
+
+    def record(self, status: int, **sample: float | None) -> None:
+        self.count += 1
+        self.statuses[status] += 1
+        if status >= 400:
+            self.errors += 1
+        for key, value in sample.items():
+            if value is not None and key in self.histograms:
+                self.histograms[key].add(value)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            **{key: hist.summary() for key, hist in self.histograms.items()},
+        }
+
+
+class ApiMetrics:
+    """Per-endpoint request metrics.
+
+    Timings are stored in milliseconds, sizes in bytes.
+    """
+
+    def __init__(self, size: int = 500):
+        self.size = size
+        self.started = time.time()
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+    def record(self, endpoint: str, status: int, **sample: float | None) -> None:
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = EndpointMetrics(endpoint, self.size)
+        self.endpoints[endpoint].record(status, **sample)
+
+    def reset(self) -> None:
+        self.started = time.time()
+        self.endpoints = {}
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        return {
+            endpoint: metrics.summary()
+            for endpoint, metrics in sorted(self.endpoints.items())
+        }
+
+    def export(self, path: str) -> None:
+        """Write the collected metrics to a JSON file."""
+        data = {
+            "started": self.started,
+            "exported": time.time(),
+            "endpoints": {},
+        }
+        for endpoint, metrics in sorted(self.endpoints.items()):
+            data["endpoints"][endpoint] = {
+                "summary": metrics.summary(),
+                "histograms": {
+                    key: metrics.histograms[key].buckets() for key in TIMING_KEYS
+                },
+                "samples": {
+                    key: list(hist.samples) for key, hist in metrics.histograms.items()
+                },
+            }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+api_metrics = ApiMetrics()
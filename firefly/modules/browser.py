@@ -76,12 +76,7 @@ class FireflyBrowserView(FireflyView):
                 tot_dur += obj.duration
 
         if self.selected_objects:
-            asset_id = self.selected_objects[-1].id
-            asset = asset_cache[asset_id]
-            if not asset:
-                asset_cache.wait()
-                asset = asset_cache[asset_id]
-            self.main_window.focus(asset)
+            self.main_window.focus_asset(self.selected_objects[-1].id)
 
             if len(self.selected_objects) > 1 and tot_dur:
                 logging.debug(
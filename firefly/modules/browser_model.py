@@ -20,6 +20,16 @@ DEFAULT_HEADER_DATA = ["title", "duration", "id_folder"]
 RECORDS_PER_PAGE = 1000
 
 
+def build_assets(payload):
+    """Create Asset objects from a browse response.
+
+    Runs in the API decoder thread, so the main thread
+    receives the response with the objects ready to use.
+    """
+    payload["objects"] = [Asset(meta=m) for m in payload.get("data", [])]
+    return payload
+
+
 class BrowserModel(FireflyViewModel):
     def load(self, callback, **kwargs):
 
@@ -29,16 +39,23 @@ class BrowserModel(FireflyViewModel):
         except KeyError:
             self.header_data = DEFAULT_HEADER_DATA
 
-        api.browse(
-            functools.partial(self.load_callback, callback),
-            # TODO: V6
-            view=kwargs["id_view"],
-            query=kwargs["fulltext"],
-            limit=RECORDS_PER_PAGE + 1,
-            order_by=kwargs["order_by"],
-            order_dir=kwargs["order_dir"],
-            offset=(self.parent().current_page - 1) * RECORDS_PER_PAGE,
+        # Only the latest query matters. Pending request of this model
+        # is cancelled, so the stale result never resets the model.
+        query = api.submit(
+            "browse",
+            {
+                # TODO: V6
+                "view": kwargs["id_view"],
+                "query": kwargs["fulltext"],
+                "limit": RECORDS_PER_PAGE + 1,
+                "order_by": kwargs["order_by"],
+                "order_dir": kwargs["order_dir"],
+                "offset": (self.parent().current_page - 1) * RECORDS_PER_PAGE,
+            },
+            channel=self,
+            prepare=build_assets,
         )
+        query.add_done_callback(functools.partial(self.load_callback, callback))
 
     def load_callback(self, callback, response):
         self.beginResetModel()
@@ -47,13 +64,15 @@ class BrowserModel(FireflyViewModel):
         if not response:
             logging.error(response.message)
 
+        objects = response.get("objects", [])
+
         # Pagination
 
         current_page = self.parent().current_page
 
-        if len(response.data) > RECORDS_PER_PAGE:
+        if len(objects) > RECORDS_PER_PAGE:
             page_count = current_page + 1
-        elif len(response.data) == 0:
+        elif len(objects) == 0:
             page_count = max(1, current_page - 1)
         else:
             page_count = current_page
@@ -63,9 +82,7 @@ class BrowserModel(FireflyViewModel):
 
         # Replace object data
 
-        if len(response.data) > RECORDS_PER_PAGE:
-            response.data.pop(-1)
-        self.object_data = [Asset(meta=m) for m in response.data]
+        self.object_data = objects[:RECORDS_PER_PAGE]
 
         self.parent().set_page(current_page, page_count)
         self.endResetModel()
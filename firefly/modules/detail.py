@@ -418,7 +418,7 @@ class DetailModule(BaseModule):
 
         self._is_loading = False
         if self._load_queue:
-            self.focus(self._load_queue)
+            self.focus(self._load_queue[0])
 
     def on_folder_changed(self):
         data = {key: self.form[key] for key in self.form.changed}
@@ -494,13 +494,24 @@ class DetailModule(BaseModule):
             except Exception:
                 aid = self.asset.id
             self.asset["id"] = aid
-            asset_cache.request([[aid, 0]])
+            asset_cache.update_saved(response, [aid])
 
         # self.form.setEnabled(True)
 
     def on_revert(self):
         if self.asset:
-            self.focus(asset_cache[self.asset.id], silent=True)
+            self.refocus()
+
+    def refocus(self):
+        """Show the cached version of the current asset."""
+        if not (id_asset := self.asset.id):
+            return
+
+        def on_ready(assets):
+            if self.asset and self.asset.id == id_asset:
+                self.focus(assets[0], silent=True)
+
+        asset_cache.when_ready([id_asset], on_ready)
 
     def on_set_qc(self, state):
         state_name = {0: "New", 3: "Rejected", 4: "Approved"}[state]
@@ -522,7 +533,7 @@ class DetailModule(BaseModule):
             aid = response["id"]
         except Exception:
             aid = self.asset.id
-        asset_cache.request([[aid, 0]])
+        asset_cache.update_saved(response, [aid])
 
     def seismic_handler(self, data):
         pass
@@ -534,4 +545,4 @@ class DetailModule(BaseModule):
         except AttributeError:
             return
         if current_id in objects:
-            self.focus(asset_cache[self.asset.id], silent=True)
+            self.refocus()
@@ -157,7 +157,7 @@ class FireflyJobsView(FireflyView):
         super(FireflyView, self).selectionChanged(selected, deselected)
         sel = self.selected_jobs
         if len(sel) == 1:
-            self.parent().main_window.focus(asset_cache[sel[0]["id_asset"]])
+            self.parent().main_window.focus_asset(sel[0]["id_asset"])
 
     @property
     def selected_jobs(self):
@@ -302,7 +302,7 @@ class RundownModule(BaseModule):
             return
 
         if message.topic == "playout_status":
-            if message.data["id_channel"] != self.id_channel:
+            if message.id_channel != self.id_channel:
                 return
 
             if message.data["current_item"] != self.current_item:
@@ -324,8 +324,8 @@ class RundownModule(BaseModule):
                 self.mcr.seismic_handler(message)
 
         elif message.topic == "objects_changed":
-            if message.data["object_type"] == "event":
-                for id_event in message.data["objects"]:
+            if message.object_type == "event":
+                for id_event in message.ids:
                     if id_event in self.view.model().event_ids:
                         logging.debug(
                             "Event id {} has been changed. Reloading rundown.".format(
@@ -334,8 +334,8 @@ class RundownModule(BaseModule):
                         )
                         self.load()
                         break
-            elif message.data["object_type"] == "asset":
-                self.refresh_assets(*message.data["objects"])
+            elif message.object_type == "asset":
+                self.refresh_assets(*message.ids)
 
         elif message.topic == "job_progress":
             if self.playout_config.send_action == message.data["id_action"]:
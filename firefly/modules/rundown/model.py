@@ -51,11 +51,15 @@ class RundownModel(FireflyViewModel):
         self.load_start_time = time.time()
         self.parent().setCursor(Qt.CursorShape.BusyCursor)
         self.current_callback = callback
-        api.rundown(
-            self.load_callback,
-            id_channel=self.id_channel,
-            date=format_time(self.start_time, "%Y-%m-%d"),
+        query = api.submit(
+            "rundown",
+            {
+                "id_channel": self.id_channel,
+                "date": format_time(self.start_time, "%Y-%m-%d"),
+            },
+            channel=self,
         )
+        query.add_done_callback(self.load_callback)
 
     def load_callback(self, response):
         self.parent().setCursor(Qt.CursorShape.ArrowCursor)
@@ -75,5 +75,5 @@ class SchedulerModule(BaseModule):
                 break
 
     def seismic_handler(self, message):
-        if message.topic == "objects_changed" and message["object_type"] == "event":
-            self.refresh_events(message["objects"])
+        if message.topic == "objects_changed" and message.object_type == "event":
+            self.refresh_events(message.ids)
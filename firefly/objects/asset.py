@@ -1,18 +1,23 @@
+import collections
+import functools
 import json
 import os
+import sys
 import time
 
 import firefly
 
 from nxtools import logging, log_traceback
 from firefly.config import config
-from firefly.enum import ObjectStatus, ContentType, MediaType
-from firefly.qt import QApplication
+from firefly.enum import ObjectStatus, ContentType, MediaType, RequestPriority
+from firefly.qt import QTimer
 
+from .asset_store import AssetStore
 from .base import BaseObject
 
 
 class Asset(BaseObject):
+    __slots__ = ()
     object_type_id = 0
     required = ["media_type", "content_type", "id_folder"]
     defaults = {"media_type": MediaType.VIRTUAL, "content_type": ContentType.TEXT}
@@ -60,114 +65,414 @@ asset_loading = Asset()
 asset_loading["title"] = "Loading..."
 asset_loading["status"] = ObjectStatus.CREATING
 
-CACHE_LIMIT = 1000
+# Requests made within this time (in milliseconds) are merged
+REQUEST_DELAY = 10
+
+# Maximum number of assets fetched by a single API request.
+# Larger batches are split to chunks fetched in parallel.
+REQUEST_CHUNK_SIZE = 500
+
+# Number of assets requested at once when looking for changed assets
+SYNC_PAGE_SIZE = 500
+
+# Maximum number of changed assets fetched by a sync. Larger gaps
+# are left to the regular (on-demand) cache updates.
+SYNC_LIMIT = 10000
+
+
+def approximate_size(meta: dict) -> int:
+    """Return a rough memory footprint of asset metadata in bytes."""
+    return sys.getsizeof(meta) + sum(sys.getsizeof(v) for v in meta.values())
 
 
 class AssetCache:
+    """Assets kept in memory (LRU), backed by the persistent store."""
+
     def __init__(self):
-        self.data = {}
+        self.data = collections.OrderedDict()
+        self.sizes = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.store = None
         self.api = None
         self.handler = None
-        self.busy = False
+        self.queued = {}
+        self.fetching = {}
+        self.pending = {}
+        self.refetch = {}
+        self.syncing = 0
+        self.synced = False
+
+    @property
+    def busy(self) -> bool:
+        """True while any requested asset is not loaded yet."""
+        return bool(self.pending) or self.syncing > 0
 
     def __getitem__(self, key):
         key = int(key)
-        if key not in self.data:
+        asset = self.lookup(key)
+        if asset is None:
             logging.debug("Direct loading asset id", key)
             self.request([[key, 0]])
             return Asset()
-        asset = self.data[key]
-        asset["_last_access"] = time.time()
         return asset
 
     def get(self, key):
         key = int(key)
-        return self.data.get(key, Asset(meta={"title": "Loading...", "id": key}))
+        if (asset := self.lookup(key)) is not None:
+            return asset
+        return Asset(meta={"title": "Loading...", "id": key})
+
+    def lookup(self, key: int) -> Asset | None:
+        """Return a cached asset, loading it from the store if needed."""
+        if (asset := self.data.get(key)) is not None:
+            self.data.move_to_end(key)
+            self.hits += 1
+            return asset
+        self.misses += 1
+        if self.store is None:
+            return None
+        if (meta := self.store.get(key)) is None:
+            return None
+        return self.put(key, Asset(meta=meta))
+
+    def load_many(self, ids: list[int]) -> dict[int, Asset]:
+        """Return cached assets with the given ids."""
+        result = {}
+        missing = []
+        for id_asset in ids:
+            if (asset := self.data.get(id_asset)) is not None:
+                self.data.move_to_end(id_asset)
+                result[id_asset] = asset
+            else:
+                missing.append(id_asset)
+        self.hits += len(result)
+        self.misses += len(missing)
+        if missing and self.store is not None:
+            for id_asset, meta in self.store.get_many(missing).items():
+                result[id_asset] = self.put(id_asset, Asset(meta=meta))
+        return result
+
+    def put(self, id_asset: int, asset: Asset) -> Asset:
+        """Store an asset in memory and evict the least recently used ones."""
+        self.size -= self.sizes.get(id_asset, 0)
+        self.data[id_asset] = asset
+        self.data.move_to_end(id_asset)
+        self.sizes[id_asset] = approximate_size(asset.meta)
+        self.size += self.sizes[id_asset]
+        self.evict()
+        return asset
+
+    def evict(self) -> None:
+        max_entries = config.asset_cache_size
+        max_size = config.asset_cache_memory * 1024 * 1024
+        while len(self.data) > 1 and (
+            (max_entries and len(self.data) > max_entries)
+            or (max_size and self.size > max_size)
+        ):
+            id_asset, _ = self.data.popitem(last=False)
+            self.size -= self.sizes.pop(id_asset)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        """Return the memory usage and hit/miss/eviction counters."""
+        return {
+            "entries": len(self.data),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
 
-    def request(self, requested: list[tuple[int, int]], handler=None):
-        self.busy = True
-        to_update = []
+    def request(
+        self,
+        requested: list[tuple[int, int]],
+        callback=None,
+        priority: RequestPriority = RequestPriority.BACKGROUND,
+    ):
+        """Fetch assets, which are not cached or older than the given mtime."""
+        requested = [(int(id), mtime) for id, mtime in requested]
+        cached = self.load_many([id for id, _ in requested])
+        to_update = {}
         for id, mtime in requested:
-            id = int(id)
-            if id not in self.data:
-                to_update.append(id)
+            if id not in cached:
+                to_update[id] = mtime
             elif not mtime:
-                to_update.append(id)
-            elif self.data[id]["mtime"] < mtime:
-                to_update.append(id)
+                to_update[id] = mtime
+            elif cached[id]["mtime"] < mtime:
+                to_update[id] = mtime
+
+        ids = [id for id, _ in requested]
         if not to_update:
+            if callback:
+                callback(ids)
             return True
 
-        asset_count = len(to_update)
-        if asset_count < 10:
+        waiting = set(to_update)
+
+        def on_loaded(id_asset):
+            waiting.discard(id_asset)
+            if not waiting and callback:
+                callback(ids)
+
+        for id, mtime in to_update.items():
+            if id not in self.pending:
+                self.pending[id] = []
+                self.enqueue(id, priority)
+            elif id in self.queued:
+                self.enqueue(id, priority)
+            else:
+                if (query := self.fetching.get(id)) is not None:
+                    self.api.promote(query.transfer, priority)
+                # Already being fetched, but the response may predate the change.
+                # Cached assets requested without mtime are fetched again
+                # once the current request finishes.
+                if id in cached and not mtime:
+                    mtime = float("inf")
+                if mtime:
+                    self.refetch[id] = max(mtime, self.refetch.get(id, 0))
+            self.pending[id].append(on_loaded)
+        return False
+
+    def enqueue(self, id_asset: int, priority: RequestPriority) -> None:
+        if not self.queued:
+            QTimer.singleShot(REQUEST_DELAY, self.flush)
+        self.queued[id_asset] = min(priority, self.queued.get(id_asset, priority))
+
+    def flush(self) -> None:
+        """Fetch queued assets."""
+        queued = self.queued
+        self.queued = {}
+        if not queued:
+            return
+        for priority in RequestPriority:
+            ids = [id for id, p in queued.items() if p == priority]
+            if ids:
+                self.fetch(ids, priority)
+
+    def fetch(self, ids: list[int], priority: RequestPriority) -> None:
+        if len(ids) < 10:
             logging.info(
                 "Requesting data for asset(s) ID: {}".format(
-                    ", ".join([str(k) for k in to_update])
+                    ", ".join([str(k) for k in ids])
                 )
             )
         else:
-            logging.info("Requesting data for {} assets".format(asset_count))
-        self.api.get(self.on_response, ids=to_update)
+            logging.info("Requesting data for {} assets".format(len(ids)))
+        for i in range(0, len(ids), REQUEST_CHUNK_SIZE):
+            chunk = ids[i:][:REQUEST_CHUNK_SIZE]
+            query = self.api.submit("get", {"ids": chunk}, priority=priority)
+            for id_asset in chunk:
+                self.fetching[id_asset] = query
+            query.add_done_callback(
+                functools.partial(self.on_response, chunk, priority)
+            )
 
-    def on_response(self, response):
+    def on_response(self, chunk, priority, response):
+        ids = []
         if response.is_error:
             logging.error(response.message)
-            self.busy = False
-            return False
-        ids = []
-        for meta in response.data:
-            try:
-                id_asset = int(meta["id"])
-            except KeyError:
+        else:
+            for meta in response.data:
+                try:
+                    id_asset = int(meta["id"])
+                except KeyError:
+                    continue
+                self.put(id_asset, Asset(meta=meta))
+                ids.append(id_asset)
+            if self.store is not None:
+                self.store.upsert(response.data)
+            logging.debug("Updated {} assets in cache".format(len(ids)))
+            if self.handler and ids:
+                self.handler(*ids)
+
+        for id_asset in chunk:
+            self.fetching.pop(id_asset, None)
+            mtime = self.refetch.pop(id_asset, None)
+            asset = self.data.get(id_asset)
+            if mtime and (asset is None or asset["mtime"] < mtime):
+                # Changed while the request was in flight
+                self.enqueue(id_asset, priority)
+                continue
+            for on_loaded in self.pending.pop(id_asset, []):
+                on_loaded(id_asset)
+        return not response.is_error
+
+    def update(self, metas: list[dict]) -> set[int]:
+        """Merge asset metadata sent by the server. Returns up to date ids."""
+        metas = [meta for meta in metas if meta.get("id") and meta.get("mtime")]
+        cached = self.load_many([int(meta["id"]) for meta in metas])
+        result = set()
+        updated = []
+        for meta in metas:
+            id_asset = int(meta["id"])
+            if (asset := cached.get(id_asset)) is not None:
+                if asset.meta.get("mtime", 0) > meta["mtime"]:
+                    result.add(id_asset)
+                    continue
+                meta = {**asset.meta, **meta}
+            elif not all(key in meta for key in Asset.required):
                 continue
-            self.data[id_asset] = Asset(meta=meta)
-            ids.append(id_asset)
-        self.busy = False
-        logging.debug("Updated {} assets in cache".format(len(ids)))
-        if self.handler:
+            cached[id_asset] = self.put(id_asset, Asset(meta=meta))
+            updated.append(meta)
+            result.add(id_asset)
+
+        if self.store is not None:
+            self.store.upsert(updated)
+        ids = [int(meta["id"]) for meta in updated]
+        if ids and self.handler:
             self.handler(*ids)
-        return True
+        return result
+
+    def update_saved(self, response, ids: list[int]) -> None:
+        """Update the cache after assets were saved using `api.set`."""
+        if not response:
+            return
+        metas = response.get("meta") or []
+        if isinstance(metas, dict):
+            metas = [metas]
+        updated = self.update(metas)
+        self.request([[id_asset, 0] for id_asset in ids if id_asset not in updated])
+
+    def sync(self, since: float, callback=None):
+        """Update cached assets changed since the given (server) time."""
+        logging.info(f"Looking for assets changed since {time.ctime(since)}")
+        self.syncing += 1
+        self.sync_page(since, 0, [], callback)
+
+    def sync_page(self, since: float, offset: int, stale: list, callback):
+        self.api.submit(
+            "browse",
+            {
+                "order_by": "mtime",
+                "order_dir": "desc",
+                "limit": SYNC_PAGE_SIZE,
+                "offset": offset,
+                "columns": ["id", "mtime"],
+                "ignore_view_conditions": True,
+            },
+            priority=RequestPriority.BACKGROUND,
+        ).add_done_callback(
+            functools.partial(self.on_sync_response, since, offset, stale, callback)
+        )
+
+    def cached_mtimes(self, ids: list[int]) -> dict[int, float]:
+        """Return mtimes of cached assets without loading them to memory."""
+        result = {}
+        missing = []
+        for id_asset in ids:
+            if (asset := self.data.get(id_asset)) is not None:
+                result[id_asset] = asset.meta.get("mtime", 0)
+            else:
+                missing.append(id_asset)
+        if missing and self.store is not None:
+            result.update(self.store.get_mtimes(missing))
+        return result
+
+    def on_sync_response(self, since, offset, stale, callback, response):
+        if not response:
+            logging.error(f"Unable to sync asset cache: {response.message}")
+            self.syncing -= 1
+            self.synced = False
+            return
+
+        changed = [row for row in response.data if row.get("mtime", 0) >= since]
+        cached = self.cached_mtimes([int(row["id"]) for row in changed])
+        for row in changed:
+            id_asset = int(row["id"])
+            if id_asset in cached and cached[id_asset] < row["mtime"]:
+                stale.append([id_asset, row["mtime"]])
+
+        offset += len(response.data)
+        if len(changed) == SYNC_PAGE_SIZE and offset < SYNC_LIMIT:
+            self.sync_page(since, offset, stale, callback)
+            return
+
+        logging.debug(f"Asset cache sync found {len(stale)} changed assets")
+        self.syncing -= 1
+        if len(changed) == SYNC_PAGE_SIZE:
+            # Older cached assets may be stale, do not record them as synced
+            logging.warning(f"More than {SYNC_LIMIT} assets changed. Sync stopped")
+            self.synced = False
+            self.request(stale)
+            return
+        self.request(stale, callback)
 
-    def wait(self):
-        while self.busy:
-            time.sleep(0.001)
-            QApplication.processEvents()
+    def synced_until(self) -> float | None:
+        """Return the (server) time the stored assets are known to be valid at."""
+        if self.store is None:
+            return None
+        if (synced := self.store.get_state("synced")) is not None:
+            return synced
+        return self.store.last_mtime()
+
+    def mark_synced(self, timestamp: float) -> None:
+        """Record that the stored assets are up to date at the given time."""
+        if self.store is not None:
+            self.store.set_state("synced", timestamp)
+
+    def when_ready(
+        self,
+        ids: list[int],
+        callback,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+    ) -> None:
+        """Call `callback(assets)` once all given assets are cached."""
+        ids = [int(id_asset) for id_asset in ids]
+        cached = self.load_many(ids)
+        missing = [[id_asset, 0] for id_asset in ids if id_asset not in cached]
+        if not missing:
+            callback([cached[id_asset] for id_asset in ids])
+            return
+        self.request(
+            missing,
+            lambda _: callback([self.get(id_asset) for id_asset in ids]),
+            priority,
+        )
 
     @property
     def cache_path(self):
+        return f"ffdata.{config.site.name}.cache.db"
+
+    @property
+    def legacy_cache_path(self):
         return f"ffdata.{config.site.name}.cache"
 
     def load(self):
-        if not os.path.exists(self.cache_path):
-            return
-        start_time = time.time()
+        """Open the persistent cache."""
         try:
-            data = json.load(open(self.cache_path))
+            self.store = AssetStore(self.cache_path)
         except Exception:
-            log_traceback(f"Corrupted cache file '{self.cache_path}'")
+            log_traceback(f"Unable to open asset cache '{self.cache_path}'")
             return
+        if os.path.exists(self.legacy_cache_path):
+            self.import_legacy_cache()
+        logging.debug(f"Asset cache contains {len(self.store)} assets")
 
-        for meta in data:
-            self.data[int(meta["id"])] = Asset(meta=meta)
-        logging.debug(
-            "Loaded {} assets from cache in {:.03f}s".format(
-                len(self.data), time.time() - start_time
-            )
-        )
+    def import_legacy_cache(self):
+        """Move assets from the JSON cache file used by older versions."""
+        try:
+            with open(self.legacy_cache_path) as f:
+                metas = json.load(f)
+            for meta in metas:
+                # Used by the old cache for eviction only
+                meta.pop("_last_access", None)
+            self.store.upsert(metas)
+        except Exception:
+            log_traceback(f"Unable to import cache file '{self.legacy_cache_path}'")
+        try:
+            os.remove(self.legacy_cache_path)
+        except OSError:
+            log_traceback()
 
     def save(self):
-        if len(self.data) > CACHE_LIMIT:
-            to_rm = list(self.data.keys())
-            to_rm.sort(key=lambda x: self.data[x].meta.get("_last_access", 0))
-            for t in to_rm[:-CACHE_LIMIT]:
-                del self.data[t]
-
-        logging.info("Saving {} assets to local cache".format(len(self.data)))
-        start_time = time.time()
-        data = [asset.meta for asset in self.data.values()]
-        with open(self.cache_path, "w") as f:
-            json.dump(data, f)
-        logging.debug("Cache updated in {:.03f}s".format(time.time() - start_time))
+        """Close the persistent cache."""
+        if self.store is None:
+            return
+        self.store.close()
+        self.store = None
 
 
 asset_cache = AssetCache()
@@ -0,0 +1,229 @@
+"""Persistent storage of cached asset metadata.
+
+Assets are stored in an SQLite database keyed by the asset ID,
+so they can be updated incrementally and loaded one by one,
+without reading or writing the whole cache at once.
+
+Writes are queued and committed by a background thread in batches,
+each batch in a single transaction, so the GUI thread never waits
+for the disk and an interrupted write never leaves a partial update.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+
+from typing import Any, Iterable
+
+from nxtools import logging, log_traceback
+
+from firefly.codec import json_dumps, json_loads
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS assets (
+        id INTEGER PRIMARY KEY,
+        mtime REAL NOT NULL,
+        meta BLOB NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_assets_mtime ON assets (mtime)",
+    "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value)",
+]
+
+UPSERT_QUERY = """
+    INSERT INTO assets (id, mtime, meta) VALUES (?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET mtime = excluded.mtime, meta = excluded.meta
+    WHERE excluded.mtime >= assets.mtime
+"""
+
+STATE_QUERY = "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)"
+
+# SQLite limits the number of query parameters
+MAX_PARAMS = 500
+
+# Maximum time (in seconds) to wait for queued writes when closing
+CLOSE_TIMEOUT = 5
+
+
+class AssetStore:
+    """Asset metadata store.
+
+    Only metadata with the same or newer mtime replaces stored records.
+    Metadata waiting to be written is kept in `pending`, so reads
+    return it even before it is committed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = self.connect()
+        self.pending: dict[int, dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self.run_writer, daemon=True)
+        self.writer.start()
+
+    @property
+    def marker_path(self) -> str:
+        """File which exists while the store is open."""
+        return self.path + ".open"
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the database, replacing it if it is damaged.
+
+        The (slow) integrity check runs only if the store was not closed
+        properly last time. Operational errors, such as a locked database,
+        are raised: the file is not damaged and must not be replaced.
+        """
+        try:
+            db = self.open_db(check=os.path.exists(self.marker_path))
+        except sqlite3.OperationalError:
+            raise
+        except sqlite3.DatabaseError:
+            log_traceback(f"Asset cache '{self.path}' is damaged. Starting over")
+            for suffix in ["", "-wal", "-shm"]:
+                if os.path.exists(self.path + suffix):
+                    os.replace(self.path + suffix, self.path + suffix + ".damaged")
+            db = self.open_db(check=False)
+        open(self.marker_path, "w").close()
+        return db
+
+    def open_db(self, check: bool) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        try:
+            if check:
+                logging.info(f"Checking asset cache '{self.path}'")
+                result = db.execute("PRAGMA quick_check").fetchone()[0]
+                if result != "ok":
+                    raise sqlite3.DatabaseError(result)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            for query in SCHEMA:
+                db.execute(query)
+            db.commit()
+        except sqlite3.Error:
+            db.close()
+            raise
+        return db
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+
+    def get(self, id_asset: int) -> dict[str, Any] | None:
+        with self.lock:
+            if (meta := self.pending.get(id_asset)) is not None:
+                return meta
+        query = "SELECT meta FROM assets WHERE id = ?"
+        if row := self.db.execute(query, [id_asset]).fetchone():
+            return json_loads(row[0])
+        return None
+
+    def get_many(self, ids: list[int]) -> dict[int, dict[str, Any]]:
+        with self.lock:
+            result = {i: self.pending[i] for i in ids if i in self.pending}
+        ids = [i for i in ids if i not in result]
+        for i in range(0, len(ids), MAX_PARAMS):
+            chunk = ids[i:][:MAX_PARAMS]
+            query = "SELECT id, meta FROM assets WHERE id IN ({})".format(
+                ",".join("?" * len(chunk))
+            )
+            for id_asset, meta in self.db.execute(query, chunk):
+                result[id_asset] = json_loads(meta)
+        return result
+
+    def get_mtimes(self, ids: list[int]) -> dict[int, float]:
+        """Return mtimes of the given stored assets."""
+        with self.lock:
+            result = {i: self.pending[i]["mtime"] for i in ids if i in self.pending}
+        ids = [i for i in ids if i not in result]
+        for i in range(0, len(ids), MAX_PARAMS):
+            chunk = ids[i:][:MAX_PARAMS]
+            query = "SELECT id, mtime FROM assets WHERE id IN ({})".format(
+                ",".join("?" * len(chunk))
+            )
+            result.update(self.db.execute(query, chunk))
+        return result
+
+    def last_mtime(self) -> float | None:
+        """Return mtime of the most recently changed stored asset."""
+        result = self.db.execute("SELECT MAX(mtime) FROM assets").fetchone()[0]
+        with self.lock:
+            mtimes = [meta["mtime"] for meta in self.pending.values()]
+        return max(mtimes + [result or 0]) or None
+
+    def get_state(self, key: str) -> Any:
+        query = "SELECT value FROM state WHERE key = ?"
+        if row := self.db.execute(query, [key]).fetchone():
+            return row[0]
+        return None
+
+    def set_state(self, key: str, value: Any) -> None:
+        self.queue.put((STATE_QUERY, [(key, value)], []))
+
+    def upsert(self, metas: Iterable[dict[str, Any]]) -> None:
+        """Queue metadata to be written."""
+        metas = [meta for meta in metas if meta.get("id")]
+        if not metas:
+            return
+        with self.lock:
+            for meta in metas:
+                meta = {**meta, "mtime": meta.get("mtime") or 0}
+                id_asset = int(meta["id"])
+                if (queued := self.pending.get(id_asset)) is not None:
+                    if queued["mtime"] > meta["mtime"]:
+                        continue
+                self.pending[id_asset] = meta
+        self.queue.put((UPSERT_QUERY, None, [int(meta["id"]) for meta in metas]))
+
+    def run_writer(self) -> None:
+        db = sqlite3.connect(self.path)
+        while True:
+            batch = [self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get())
+            try:
+                self.write(db, [job for job in batch if job is not None])
+            except sqlite3.Error:
+                log_traceback("Unable to update asset store", handlers=False)
+            if None in batch:
+                break
+        db.close()
+
+    def write(self, db: sqlite3.Connection, batch: list) -> None:
+        """Write a batch of queued jobs in a single transaction."""
+        written = {}
+        with db:
+            for query, rows, ids in batch:
+                if rows is None:
+                    with self.lock:
+                        for id_asset in ids:
+                            if id_asset in self.pending:
+                                written[id_asset] = self.pending[id_asset]
+                    continue
+                db.executemany(query, rows)
+            if written:
+                db.executemany(
+                    UPSERT_QUERY,
+                    [
+                        (id_asset, meta["mtime"], json_dumps(meta))
+                        for id_asset, meta in written.items()
+                    ],
+                )
+        with self.lock:
+            for id_asset, meta in written.items():
+                if self.pending.get(id_asset) is meta:
+                    del self.pending[id_asset]
+
+    def close(self) -> None:
+        """Write queued changes and close the database."""
+        self.queue.put(None)
+        self.writer.join(CLOSE_TIMEOUT)
+        self.db.close()
+        if self.writer.is_alive():
+            logging.warning("Asset cache is still being written. Closing anyway")
+            return
+        try:
+            os.remove(self.marker_path)
+        except OSError:
+            log_traceback()
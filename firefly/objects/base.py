@@ -1,18 +1,30 @@
+import sys
 import time
 import pprint
 
 from nxtools import logging
 
 from firefly.enum import RunMode, ObjectStatus, Colors
-from firefly.metadata import MetaTypes
+from firefly.metadata import MetaTypes, field_default
 from firefly.metadata.normalize import normalize_meta
 from firefly.metadata.format import format_meta
 
 from .format import format_helpers, STATUS_FG_COLORS
 
+# String values up to this length (statuses, codes, frame rates...)
+# are interned, so objects share a single copy of each
+INTERN_LIMIT = 16
+
 
 class BaseObject:
-    """Base object properties."""
+    """Base object properties.
+
+    Objects use `__slots__` and interned metadata keys (and short string
+    values), so large numbers of cached assets take as little memory
+    as possible. Subclasses must declare their own `__slots__`.
+    """
+
+    __slots__ = ("meta", "text_changed", "meta_changed", "is_new")
 
     required = []
     defaults = {}
@@ -21,7 +33,6 @@ class BaseObject:
         """Object constructor."""
         self.text_changed = self.meta_changed = False
         self.is_new = True
-        self.meta = {}
         meta = kwargs.get("meta", {})
         if id:
             assert type(id) == int, f"{self.object_type} ID must be integer"
@@ -29,8 +40,15 @@ class BaseObject:
             meta is not None
         ), f"Unable to load {self.object_type}. Meta must not be 'None'"
         assert hasattr(meta, "keys"), "Incorrect meta!"
-        for key in meta:
-            self.meta[key] = meta[key]
+        intern = sys.intern
+        self.meta = {
+            intern(key): (
+                intern(value)
+                if type(value) is str and len(value) <= INTERN_LIMIT
+                else value
+            )
+            for key, value in meta.items()
+        }
         if "id" in self.meta:
             self.is_new = False
         elif not self.meta:
@@ -79,13 +97,10 @@ class BaseObject:
         return default
 
     def __getitem__(self, key):
-        key = key.lower().strip()
+        key, default = field_default(self.id_folder, key)
         if key == "_duration":
             return self.duration  # noqa
-        if key not in self.meta_types:
-            return self.meta.get(key, None)
-        else:
-            return self.meta.get(key, self.meta_types[key].default)
+        return self.meta.get(key, default)
 
     def __setitem__(self, key, value):
         """Set a metadata value
@@ -2,6 +2,7 @@ from .base import BaseObject
 
 
 class Bin(BaseObject):
+    __slots__ = ("items",)
     object_type_id = 2
     required = ["bin_type"]
     defaults = {"bin_type": 0}
@@ -1,6 +1,7 @@
 from .base import BaseObject
 
 class Event(BaseObject):
+    __slots__ = ()
     object_type_id = 3
     required = ["start", "id_channel"]
 
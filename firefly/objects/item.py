@@ -1,26 +1,31 @@
+from firefly.metadata import field_default, normalize_key
+
 from .base import BaseObject
 from .asset import asset_cache
 
 class Item(BaseObject):
+    __slots__ = ("id_channel", "_asset")
     object_type_id = 1
     required = ["id_bin", "id_asset", "position"]
 
     def __getitem__(self, key):
-        key = key.lower().strip()
-        if key not in self.meta:
-            if key == "id_asset":
-                return 0
-            elif self.asset:
-                return self.asset[key]
-            else:
-                return self.meta_types[key].default
-        return self.meta[key]
+        key = normalize_key(key)
+        if key in self.meta:
+            return self.meta[key]
+        if key == "id_asset":
+            return 0
+        if asset := self.asset:
+            return asset[key]
+        return field_default(self.meta.get("id_folder"), key)[1]
 
     @property
     def asset(self):
-        if not self["id_asset"]:
+        if not (id_asset := self.meta.get("id_asset")):
             return False
-        return asset_cache.get(self["id_asset"])
+        # Rundown attaches the asset and keeps it up to date
+        if asset := getattr(self, "_asset", None):
+            return asset
+        return asset_cache.get(id_asset)
 
     @property
     def id_folder(self):
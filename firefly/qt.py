@@ -5,12 +5,16 @@ import firefly
 from nxtools import logging, log_traceback
 
 from PySide6.QtCore import (
+    Signal,
+    QObject,
     QSettings,
     QUrlQuery,
     QUrl,
     QTimer,
     QEvent,
+    QEventLoop,
     QThread,
+    QThreadPool,
     QModelIndex,
     QItemSelection,
     QItemSelectionModel,
@@ -72,6 +76,9 @@ from PySide6.QtWidgets import (
     QTabWidget,
     QDialogButtonBox,
     QTableView,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
     QFileDialog,
     QScrollArea,
     QFrame,
@@ -83,7 +90,10 @@ from PySide6.QtWidgets import (
 
 from PySide6.QtNetwork import (
     QNetworkAccessManager,
+    QNetworkReply,
     QNetworkRequest,
+    QSslConfiguration,
+    QSslSocket,
 )
 
 